@@ -14,14 +14,26 @@ import sys
 import argparse
 from pathlib import Path
 
+# Compiled once - validates and parses versions like "1.2.3" in one scan
+_VERSION_RE = re.compile(r'^(?P<major>\d+)\.(?P<minor>\d+)\.(?P<patch>\d+)$')
 
-def get_current_version(file_path: str, pattern: str) -> str:
-    """Extract current version from file"""
-    content = Path(file_path).read_text()
-    match = re.search(pattern, content)
+
+def _template_pattern(template: str) -> 're.Pattern':
+    """Build a version-extraction regex from a format template"""
+    return re.compile(re.escape(template).replace(re.escape('{}'), r'([\d.]+)'))
+
+
+def get_current_version(file_path: str, template: str) -> tuple:
+    """Extract current version from file, returning (version, content)
+
+    The content is returned too so callers can update the file without
+    re-reading it from disk.
+    """
+    content = Path(file_path).read_text(encoding='utf-8')
+    match = _template_pattern(template).search(content)
     if not match:
         raise ValueError(f"Version not found in {file_path}")
-    return match.group(1)
+    return match.group(1), content
 
 
 def bump_version(version: str, bump_type: str) -> str:
@@ -36,15 +48,17 @@ def bump_version(version: str, bump_type: str) -> str:
         New version string
     """
     # If explicit version provided, use it
-    if re.match(r'^\d+\.\d+\.\d+$', bump_type):
+    if _VERSION_RE.match(bump_type):
         return bump_type
-    
-    # Parse current version
-    parts = version.split('.')
-    if len(parts) != 3:
+
+    # Parse current version (validation and capture in a single scan)
+    match = _VERSION_RE.match(version)
+    if not match:
         raise ValueError(f"Invalid version format: {version}")
-    
-    major, minor, patch = map(int, parts)
+
+    major = int(match['major'])
+    minor = int(match['minor'])
+    patch = int(match['patch'])
     
     # Bump appropriate part
     if bump_type == 'major':
@@ -62,21 +76,19 @@ def bump_version(version: str, bump_type: str) -> str:
     return f"{major}.{minor}.{patch}"
 
 
-def update_file(file_path: str, pattern: str, old_version: str, new_version: str):
-    """Update version in file"""
-    content = Path(file_path).read_text()
-    
-    # Replace version
-    new_content = re.sub(
-        pattern.replace(r'([\d.]+)', old_version),
-        pattern.replace(r'([\d.]+)', new_version).replace('(', '').replace(')', ''),
-        content
-    )
-    
+def update_file(file_path: str, content: str, template: str,
+                old_version: str, new_version: str):
+    """Update version in file (content already read by the caller)"""
+    # Exact literal search-and-splice - no regex engine involved, and
+    # dots in the version can't match arbitrary characters
+    needle = template.format(old_version)
+    replacement = template.format(new_version)
+    new_content = content.replace(needle, replacement, 1)
+
     if content == new_content:
         raise ValueError(f"Failed to update version in {file_path}")
     
-    Path(file_path).write_text(new_content)
+    Path(file_path).write_text(new_content, encoding='utf-8')
     print(f"✅ Updated {file_path}: {old_version} → {new_version}")
 
 
@@ -115,15 +127,17 @@ Examples:
     
     args = parser.parse_args()
     
-    # File paths and patterns
+    # File paths and version-line templates
     files = {
-        'pyproject.toml': r'version = "([\d.]+)"',
-        'earlyexit/__init__.py': r'__version__ = "([\d.]+)"',
+        'pyproject.toml': 'version = "{}"',
+        'earlyexit/__init__.py': '__version__ = "{}"',
     }
     
     try:
-        # Get current version from pyproject.toml
-        current_version = get_current_version('pyproject.toml', files['pyproject.toml'])
+        # Get current version from pyproject.toml (content cached for the update)
+        current_version, pyproject_content = get_current_version(
+            'pyproject.toml', files['pyproject.toml'])
+        contents = {'pyproject.toml': pyproject_content}
         print(f"📦 Current version: {current_version}")
         
         # Calculate new version
@@ -138,8 +152,11 @@ Examples:
         
         # Update all files
         print("\n📝 Updating files...")
-        for file_path, pattern in files.items():
-            update_file(file_path, pattern, current_version, new_version)
+        for file_path, template in files.items():
+            content = contents.get(file_path)
+            if content is None:
+                content = Path(file_path).read_text(encoding='utf-8')
+            update_file(file_path, content, template, current_version, new_version)
         
         print(f"\n✨ Successfully bumped version: {current_version} → {new_version}")
         print("\n📋 Next steps:")
@@ -10,15 +10,26 @@ Implements the early error detection pattern for faster feedback.
 
 import sys
 import re
+import json
 import argparse
 import signal
+import traceback
 import subprocess
 import select
+import selectors
+import queue
 import threading
 import os
+import io
+import codecs
+import functools
+import mmap
+import shutil
+import stat
 import time
 from typing import Optional, Pattern, IO, Dict, List
 from pathlib import Path
+from collections import deque
 
 # psutil for inspecting subprocess file descriptors (optional)
 try:
@@ -28,13 +39,92 @@ except ImportError:
     PSUTIL_AVAILABLE = False
     psutil = None
 
-# Telemetry (optional, fails gracefully)
+# Telemetry (optional, fails gracefully). Loaded lazily: the module
+# drags in sqlite3 and the collector machinery, which the common
+# pattern+command path with telemetry disabled should never pay for
+# Cached once: the CLI never forks the interpreter itself, so the pid
+# used in telemetry execution IDs is stable for the whole invocation
+_PID = os.getpid()
+
+# Never-matching sentinel used by timeout-only and dual-pattern modes;
+# compiled once so those invocations skip compile_pattern altogether
+_NEVER_MATCH = re.compile(r'(?!.*)')
+
+# Truthy env values, hashed for O(1) membership instead of a tuple scan
+_TRUEISH = frozenset({'1', 'true', 'yes', 'on'})
+
+# Parsed once at import: the environment can't change mid-invocation,
+# and both telemetry enablement sites shared this exact computation
+_NO_TELEMETRY_ENV = os.environ.get('EARLYEXIT_NO_TELEMETRY', '').lower() in _TRUEISH
+
+
+@functools.lru_cache(maxsize=1)
+def _load_telemetry():
+    """Import and cache the telemetry module; None if unavailable"""
+    try:
+        from . import telemetry
+        return telemetry
+    except ImportError:
+        return None
+
+
+# Execution records are written off the exit path: record sites drop the
+# payload on a queue serviced by a lazily started daemon writer, so the
+# CLI's visible exit latency no longer includes the sqlite write. An
+# atexit hook (or an explicit _flush_telemetry before os._exit) gives
+# pending writes a short, bounded window to land.
+_TEL_QUEUE = None
+_TEL_DONE = None
+
+
+def _enqueue_telemetry_call(write_call):
+    """Queue one zero-arg write callable for the background writer"""
+    global _TEL_QUEUE, _TEL_DONE
+    if _TEL_QUEUE is None:
+        _TEL_QUEUE = queue.SimpleQueue()
+        _TEL_DONE = threading.Event()
+
+        def _drain():
+            while True:
+                item = _TEL_QUEUE.get()
+                if item is None:
+                    break
+                try:
+                    item()
+                except Exception:
+                    # Telemetry must never disrupt the run
+                    pass
+            _TEL_DONE.set()
+
+        threading.Thread(target=_drain, daemon=True).start()
+        import atexit
+        atexit.register(_flush_telemetry)
+    _TEL_QUEUE.put(write_call)
+
+
+def _enqueue_telemetry(collector, payload):
+    """Queue one execution record for the background telemetry writer"""
+    # Copy: callers keep mutating their dict between record sites
+    data = dict(payload)
+    _enqueue_telemetry_call(lambda: collector.record_execution(data))
+
+
+def _flush_telemetry(timeout: float = 2.0):
+    """Stop the writer and give pending records a bounded flush window"""
+    if _TEL_QUEUE is not None:
+        _TEL_QUEUE.put(None)
+        _TEL_DONE.wait(timeout)
+
+# Google RE2 (optional): a DFA engine that matches in linear time even on
+# catastrophic-backtracking patterns. pyre2 mirrors the re API, so compiled
+# patterns drop in transparently; patterns RE2 rejects (backrefs,
+# look-around) fall back to the standard engine in compile_pattern
 try:
-    from . import telemetry
-    TELEMETRY_AVAILABLE = True
+    import re2 as _re2
+    RE2_AVAILABLE = True
 except ImportError:
-    TELEMETRY_AVAILABLE = False
-    telemetry = None
+    RE2_AVAILABLE = False
+    _re2 = None
 
 
 class TimeoutError(Exception):
@@ -47,6 +137,16 @@ def timeout_handler(signum, frame):
     raise TimeoutError("Timeout exceeded")
 
 
+# Install the SIGALRM handler once at import instead of per-invocation;
+# main() then only arms/disarms the alarm itself. Guarded: SIGALRM is
+# POSIX-only and handlers can only be set from the main thread
+if hasattr(signal, 'SIGALRM'):
+    try:
+        signal.signal(signal.SIGALRM, timeout_handler)
+    except (ValueError, OSError):
+        pass
+
+
 def parse_time(time_str: str) -> float:
     """
     Parse time string with optional suffix (like timeout/sleep commands)
@@ -84,7 +184,6 @@ def parse_time(time_str: str) -> float:
     }
     
     # Extract number and suffix
-    import re
     match = re.match(r'^([\d.]+)([smhd])$', time_str.lower())
     if not match:
         raise ValueError(f"Invalid time format: {time_str}. Expected: number[smhd] (e.g., '30s', '5m', '2h', '1d')")
@@ -98,63 +197,55 @@ def parse_time(time_str: str) -> float:
     return num * suffix_map[suffix]
 
 
-def normalize_line_for_comparison(line: str, strip_timestamps: bool = True, stuck_pattern: str = None) -> str:
+# Timestamp shapes stripped during stuck-detection normalization, fused
+# into one alternation compiled at import - normalize_line_for_comparison
+# runs per output line, and a single sub() scans the line once where the
+# old per-shape passes each re-walked (and re-allocated) the whole string.
+# Alternative order matters: the date arm greedily takes an attached ISO
+# time so the more specific form wins at any given position
+_TS_RE = re.compile(
+    r'\[\d{2}:\d{2}:\d{2}(?:\.\d+)?\]'          # [HH:MM:SS] / [HH:MM:SS.mmm]
+    r'|\d{4}[-/]\d{2}[-/]\d{2}'                  # YYYY-MM-DD / YYYY/MM/DD ...
+    r'(?:[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:\d{2})?)?'  # ... ISO time
+    r'|\b\d{2}:\d{2}:\d{2}\b'                    # HH:MM:SS
+    r'|\b\d{13}\b'                               # Epoch milliseconds
+    r'|\b\d{10}\b'                               # Unix epoch seconds
+)
+_WS_RE = re.compile(r'\s+')
+
+
+def normalize_line_for_comparison(line: str, strip_timestamps: bool = True,
+                                  stuck_pattern: Optional[Pattern] = None) -> str:
     """
     Normalize a line for comparison to detect stuck/repeated output.
     
     Args:
         line: Input line to normalize
         strip_timestamps: If True, remove common timestamp patterns
-        stuck_pattern: If provided, extract only the part matching this regex
+        stuck_pattern: Precompiled regex; if provided, extract only the
+            part matching it (callers compile once - this runs per line)
     
     Returns:
         Normalized line with timestamps removed and whitespace collapsed,
         or extracted pattern match if stuck_pattern is provided
     """
-    import re
     
     # If stuck_pattern provided, extract and return that part only
-    if stuck_pattern:
-        try:
-            match = re.search(stuck_pattern, line)
-            if match:
-                # Return the matched part (what we're watching for repetition)
-                return match.group(0).strip()
-            else:
-                # Pattern didn't match, use full line
-                pass
-        except re.error:
-            # Invalid regex, fall through to normal processing
-            pass
+    if stuck_pattern is not None:
+        match = stuck_pattern.search(line)
+        if match:
+            # Return the matched part (what we're watching for repetition)
+            return match.group(0).strip()
+        # Pattern didn't match, use full line
     
     # Normal processing
     if not strip_timestamps:
         return line.strip()
     
-    # Strip common timestamp patterns
-    normalized = line
-    
-    # [HH:MM:SS] or [HH:MM:SS.mmm]
-    normalized = re.sub(r'\[\d{2}:\d{2}:\d{2}(?:\.\d+)?\]', '', normalized)
-    
-    # YYYY-MM-DD or YYYY/MM/DD
-    normalized = re.sub(r'\d{4}[-/]\d{2}[-/]\d{2}', '', normalized)
-    
-    # HH:MM:SS (not in brackets)
-    normalized = re.sub(r'\b\d{2}:\d{2}:\d{2}\b', '', normalized)
-    
-    # Timestamps like "2024-11-14T09:03:45" or "2024-11-14 09:03:45"
-    normalized = re.sub(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:\d{2})?', '', normalized)
-    
-    # Unix epoch timestamps (10 digits)
-    normalized = re.sub(r'\b\d{10}\b', '', normalized)
-    
-    # Millisecond timestamps (13 digits)
-    normalized = re.sub(r'\b\d{13}\b', '', normalized)
-    
-    # Collapse multiple spaces to single space
-    normalized = re.sub(r'\s+', ' ', normalized)
-    
+    # Strip all timestamp shapes in one pass, then collapse whitespace
+    normalized = _TS_RE.sub('', line)
+    normalized = _WS_RE.sub(' ', normalized)
+
     return normalized.strip()
 
 
@@ -165,20 +256,11 @@ def update_ee_env_exit_code(exit_code: int):
         ee_env_file = os.path.expanduser(f"~/.ee_env.{parent_pid}")
         # Only update if file exists (log files were created)
         if os.path.exists(ee_env_file):
-            # Read existing content
-            with open(ee_env_file, 'r') as f:
-                lines = f.readlines()
-            # Update or add exit code
-            with open(ee_env_file, 'w') as f:
-                exit_code_written = False
-                for line in lines:
-                    if line.startswith('export EE_EXIT_CODE='):
-                        f.write(f"export EE_EXIT_CODE={exit_code}\n")
-                        exit_code_written = True
-                    else:
-                        f.write(line)
-                if not exit_code_written:
-                    f.write(f"export EE_EXIT_CODE={exit_code}\n")
+            # Append-only, last assignment wins when sourced: the file is
+            # rewritten without an EE_EXIT_CODE line at startup, so there
+            # is no need to read and rewrite every line just to add one
+            with open(ee_env_file, 'a') as f:
+                f.write(f"export EE_EXIT_CODE={exit_code}\n")
     except Exception:
         pass  # Silent failure
 
@@ -254,8 +336,6 @@ def create_json_output(
     Returns:
         JSON string
     """
-    import json
-    
     output = {
         "version": "0.0.5",
         "exit_code": exit_code,
@@ -296,20 +376,20 @@ def format_duration(seconds: float) -> str:
         return f"{minutes:02d}:{secs:02d}"
 
 
-def show_progress_indicator(args, start_time: float, last_output_time: list, 
-                            lines_processed: list, match_count: list, 
+def show_progress_indicator(args, start_time: float, ctx: 'StreamCtx',
                             stop_event: threading.Event):
     """
     Display progress indicator on stderr.
-    
+
     Args:
         args: Arguments namespace
         start_time: When monitoring started (timestamp)
-        last_output_time: List with [last_output_timestamp]
-        lines_processed: List with [line_count]
-        match_count: List with [match_count]
+        ctx: Shared StreamCtx with live output/match counters
         stop_event: Threading event to signal stop
     """
+    clear_line = '\r' + ' ' * 120
+    stderr_write = sys.stderr.write
+    last_drawn = None
     while not stop_event.is_set():
         elapsed = time.time() - start_time
         elapsed_str = format_duration(elapsed)
@@ -324,8 +404,8 @@ def show_progress_indicator(args, start_time: float, last_output_time: list,
             timeout_str = elapsed_str
         
         # Time since last output
-        if last_output_time[0] and last_output_time[0] > 0:
-            since_output = time.time() - last_output_time[0]
+        if ctx.last_output_time and ctx.last_output_time > 0:
+            since_output = time.monotonic() - ctx.last_output_time
             last_output_str = format_duration(since_output) + " ago"
         else:
             last_output_str = "waiting..."
@@ -337,23 +417,216 @@ def show_progress_indicator(args, start_time: float, last_output_time: list,
         progress = (
             f"\r[{timeout_str}] Monitoring {command_name}... "
             f"Last output: {last_output_str} | "
-            f"Lines: {lines_processed[0]:,} | "
-            f"Matches: {match_count[0]}"
+            f"Lines: {ctx.lines_processed:,} | "
+            f"Matches: {ctx.match_count}"
         )
         
-        # Clear line and print (overwrite previous progress)
-        sys.stderr.write('\r' + ' ' * 120)  # Clear line
-        sys.stderr.write(progress)
-        sys.stderr.flush()
-        
+        # Only repaint when the rendered line actually changed - a
+        # quiescent command with coarse duration buckets ("5m") would
+        # otherwise clear and rewrite identical text every tick
+        if progress != last_drawn:
+            stderr_write(clear_line)  # Clear line
+            stderr_write(progress)
+            sys.stderr.flush()
+            last_drawn = progress
+
         # Update every 2 seconds
         stop_event.wait(2)
-    
+
     # Clear progress line when done
-    sys.stderr.write('\r' + ' ' * 120 + '\r')
+    stderr_write(clear_line + '\r')
     sys.stderr.flush()
 
 
+# Non-source paths to skip during fd inspection, compiled to a single
+# alternation: one scan per path instead of ten Python-level substring tests
+_FD_SKIP_RE = re.compile(
+    r'/dev/|/proc/|/sys/|/tmp/'
+    r'|\.so|\.dylib|\.dll'  # Libraries
+    r'|/lib/|/usr/lib/'
+    r'|site-packages/'
+    r'|__pycache__/'
+)
+
+# Command names that should never be treated as match patterns when they
+# lead the argument list (frozenset: O(1) membership, built once)
+_KNOWN_COMMANDS = frozenset((
+    'mist', 'databricks', 'kubectl', 'terraform', 'docker', 'aws', 'gcloud',
+    'az', 'python', 'python3', 'node', 'bash', 'sh', 'npm', 'yarn', 'cargo',
+    'go', 'java',
+))
+
+# "Simple lowercase word, no regex metacharacters" - the shape of a command
+# name rather than a pattern
+_SIMPLE_WORD_RE = re.compile(r'^[a-z][a-z0-9_-]*$')
+
+# Options that consume the following argv element as their value, for the
+# pre-parse '--' scan: frozenset membership is one hash per element
+# instead of a linear scan of this list per argument
+_VALUE_OPTS = frozenset((
+    '-t', '--timeout', '-I', '--idle-timeout', '-F', '--first-output-timeout',
+    '-m', '--max-count', '--delay-exit', '--fd', '--source-file', '--pid-file',
+    '--file-prefix', '--log-dir', '--profile', '--fd-pattern', '-A', '-B', '-C',
+    '--delay-exit-after-lines', '-s', '--success-pattern', '-e', '--error-pattern',
+    '-X', '--exclude',
+))
+
+
+def _wait_fast(process, spin_s: float = 0.005, hard_s: float = 1.0) -> bool:
+    """
+    Reap a child that was just signaled, with minimal latency.
+
+    Popen.wait(timeout=...) sleeps in coarse increments, but after
+    SIGTERM most children die in microseconds. Micro-poll for a few
+    milliseconds first, then block on a pidfd where the kernel supports
+    it (Linux 5.3+) so the reap is event-driven, and only fall back to
+    the coarse wait when neither settles it.
+
+    Returns True once the child is reaped, False if it survived hard_s
+    (caller should escalate to kill).
+    """
+    deadline = time.monotonic() + spin_s
+    while True:
+        if process.poll() is not None:
+            return True
+        if time.monotonic() >= deadline:
+            break
+        time.sleep(0.0005)
+    if hasattr(os, 'pidfd_open'):
+        try:
+            pfd = os.pidfd_open(process.pid)
+        except OSError:
+            pfd = None
+        if pfd is not None:
+            try:
+                select.select([pfd], [], [], hard_s)
+            finally:
+                os.close(pfd)
+            return process.poll() is not None
+    try:
+        process.wait(timeout=hard_s)
+        return True
+    except subprocess.TimeoutExpired:
+        return False
+
+
+def _shutdown_process(process, timeout_timer=None):
+    """
+    Cancel the timeout timer and terminate-then-kill the child.
+
+    One exit primitive for every run_command_mode branch instead of the
+    same cancel/terminate/wait/kill sequence copy-pasted per branch. The
+    guards tolerate sandboxes where signaling raises PermissionError and
+    children that already exited.
+    """
+    if timeout_timer:
+        timeout_timer.cancel()
+    if process.poll() is not None:
+        return
+    try:
+        process.terminate()
+    except (PermissionError, OSError):
+        pass
+    if not _wait_fast(process):
+        try:
+            process.kill()
+        except (PermissionError, OSError):
+            pass
+
+
+def _should_exit_now(delay_exit, after_lines, match_timestamp, post_match_lines):
+    """
+    Decide whether the match threshold should end the run right now.
+
+    One copy of the delay-exit arithmetic shared by both wait loops in
+    run_command_mode: inside a --delay-exit window the run ends when the
+    window elapses or --delay-exit-after-lines lines have been captured;
+    without a window (or before any match stamped a timestamp) it ends
+    immediately.
+    """
+    if delay_exit and delay_exit > 0 and match_timestamp > 0:
+        if time.time() - match_timestamp >= delay_exit:
+            return True
+        return post_match_lines >= after_lines
+    return delay_exit == 0 or match_timestamp == 0
+
+
+def _announce_detach(args, ctx, process):
+    """Mark the child as detached: print guidance and write the PID file"""
+    ctx.detached_pid = process.pid
+    if not args.quiet:
+        if args.detach_group:
+            pgid = get_process_group_id(process.pid)
+            print(f"\n🔓 Detached from process group (PGID: {pgid}, PID: {process.pid})", file=sys.stderr)
+        else:
+            print(f"\n🔓 Detached from subprocess (PID: {process.pid})", file=sys.stderr)
+        print(f"   Subprocess continues running in background", file=sys.stderr)
+        if args.detach_group:
+            pgid = get_process_group_id(process.pid)
+            print(f"   Use 'kill -- -{pgid}' to stop process group", file=sys.stderr)
+        else:
+            print(f"   Use 'kill {process.pid}' to stop it later", file=sys.stderr)
+    if args.pid_file:
+        write_pid_file(process.pid, args.pid_file, args.quiet)
+
+
+def _wait_for_monitors(threads, args, ctx, process, timeout_timer,
+                       check_stuck=False):
+    """
+    Shared wait loop for the command-mode monitor threads.
+
+    Blocks event-driven on ctx.wake (0.5s liveness cap) until every
+    monitor thread finishes, the match threshold plus delay-exit window
+    says to stop, a timeout fires, or - with check_stuck - stuck
+    detection trips, in which case 'stuck' is returned and the caller
+    owns cleanup. On a qualifying match the child is detached (--detach)
+    or shut down here. One copy of the loop the multi-stream and
+    single-stream branches used to inline separately.
+    """
+    # Invariant args lookups hoisted to locals - the loop re-checks
+    # them on every wakeup and LOAD_FAST beats LOAD_ATTR + dict probe
+    max_count = args.max_count
+    delay_exit = args.delay_exit
+    after_lines = args.delay_exit_after_lines
+    while any(t.is_alive() for t in threads):
+        if check_stuck and ctx.stuck_detected:
+            return 'stuck'
+
+        if ctx.match_count >= max_count:
+            # Exit when the delay-exit window expired or enough lines captured
+            if _should_exit_now(delay_exit, after_lines,
+                                ctx.match_timestamp, ctx.post_match_lines):
+                if timeout_timer:
+                    timeout_timer.cancel()
+                if args.detach:
+                    # Detach mode: don't kill, just break out of the loop
+                    _announce_detach(args, ctx, process)
+                elif args.detach_group:
+                    # Kill process group, falling back to the single child
+                    pgid = get_process_group_id(process.pid)
+                    if pgid:
+                        kill_process_group(pgid)
+                    else:
+                        _shutdown_process(process)
+                else:
+                    _shutdown_process(process)
+                break
+        if ctx.timed_out:
+            break
+        # Block until a monitor signals (match, stuck, timeout,
+        # stream EOF). Inside the delay-exit window wait only as
+        # long as the window has left; cap at 0.5s as a liveness
+        # safety net either way
+        if (ctx.match_count >= max_count and delay_exit
+                and delay_exit > 0 and ctx.match_timestamp > 0):
+            remaining = delay_exit - (time.time() - ctx.match_timestamp)
+            ctx.wake.wait(min(0.5, max(0.01, remaining)))
+        else:
+            ctx.wake.wait(0.5)
+        ctx.wake.clear()
+    return None
+
+
 def inspect_process_fds(pid: int, delay: float = 0.1) -> List[str]:
     """
     Inspect a process's open file descriptors to find regular files
@@ -375,39 +648,37 @@ def inspect_process_fds(pid: int, delay: float = 0.1) -> List[str]:
     try:
         proc = psutil.Process(pid)
         open_files = []
-        
+        skip_search = _FD_SKIP_RE.search
+        isfile = os.path.isfile
+        # Relativize with one getcwd + a prefix check per path instead of
+        # os.path.relpath, which re-runs getcwd and the full path algorithm
+        # for every open file
+        try:
+            cwd_prefix = os.getcwd() + os.sep
+        except OSError:
+            cwd_prefix = None
+
         for f in proc.open_files():
             # f is a named tuple: (path, fd, position, mode, flags)
             path = f.path
-            
+
             # Filter out system files, pipes, sockets
             if not path:
                 continue
-            
+
             # Skip common non-source file paths
-            skip_patterns = [
-                '/dev/', '/proc/', '/sys/', '/tmp/',
-                '.so', '.dylib', '.dll',  # Libraries
-                '/lib/', '/usr/lib/',
-                'site-packages/',
-                '__pycache__/',
-            ]
-            
-            if any(pattern in path for pattern in skip_patterns):
+            if skip_search(path):
                 continue
-            
+
             # Check if it's a real file (not directory, socket, etc.)
             try:
-                if os.path.isfile(path):
-                    # Convert to relative path if possible
-                    try:
-                        rel_path = os.path.relpath(path)
-                        if not rel_path.startswith('..'):
-                            open_files.append(rel_path)
-                        else:
-                            open_files.append(path)
-                    except ValueError:
-                        # Different drives on Windows, keep absolute
+                if isfile(path):
+                    # Files under the CWD become relative; everything else
+                    # stays absolute (matches the old relpath behavior,
+                    # which kept paths that would start with '..')
+                    if cwd_prefix and path.startswith(cwd_prefix):
+                        open_files.append(path[len(cwd_prefix):])
+                    else:
                         open_files.append(path)
             except (OSError, FileNotFoundError):
                 pass
@@ -418,21 +689,35 @@ def inspect_process_fds(pid: int, delay: float = 0.1) -> List[str]:
         return []
 
 
-def compile_pattern(pattern: str, flags: int = 0, perl_style: bool = False, 
+# Warn about the missing 'regex' module once per process, not per compile
+_regex_fallback_warned = False
+
+
+@functools.lru_cache(maxsize=256)
+def compile_pattern(pattern: str, flags: int = 0, perl_style: bool = False,
                    word_regexp: bool = False, line_regexp: bool = False) -> Pattern:
     """
     Compile regex pattern with appropriate flags
-    
+
+    Results are memoized: repeated calls with the same arguments (e.g.
+    watch mode re-running a command, or the re.compile 512-entry internal
+    cache being bypassed) return the already-compiled pattern object.
+
+    When the optional re2 module is installed, non-Perl patterns compile
+    on Google RE2 for guaranteed linear-time matching; patterns RE2
+    cannot express fall back to the standard engine.
+
     Args:
         pattern: Regex pattern string
         flags: re module flags
         perl_style: Use regex module for Perl-compatible patterns
         word_regexp: Match whole words only (like grep -w)
         line_regexp: Match whole lines only (like grep -x)
-        
+
     Returns:
         Compiled pattern object
     """
+    global _regex_fallback_warned
     # Apply word/line boundaries (like grep -w/-x)
     if word_regexp:
         pattern = r'\b' + pattern + r'\b'
@@ -444,83 +729,543 @@ def compile_pattern(pattern: str, flags: int = 0, perl_style: bool = False,
             import regex
             return regex.compile(pattern, flags)
         except ImportError:
-            print("⚠️  Warning: 'regex' module not installed. Install with: pip install regex", 
-                  file=sys.stderr)
-            print("   Falling back to standard 're' module", file=sys.stderr)
+            if not _regex_fallback_warned:
+                _regex_fallback_warned = True
+                print("⚠️  Warning: 'regex' module not installed. Install with: pip install regex",
+                      file=sys.stderr)
+                print("   Falling back to standard 're' module", file=sys.stderr)
             return re.compile(pattern, flags)
     else:
+        if RE2_AVAILABLE:
+            try:
+                return _re2.compile(pattern, flags)
+            except Exception:
+                # RE2 rejects Perl-only constructs (backrefs, look-around)
+                # and some flag combinations - use the backtracking engine
+                pass
         return re.compile(pattern, flags)
 
 
-def process_stream(stream: IO, pattern: Optional[Pattern], args, line_number_offset: int, 
-                   match_count: list, use_color: bool, stream_name: str = "",
-                   last_output_time: Optional[list] = None, first_output_seen: Optional[list] = None,
-                   first_stream_time: Optional[list] = None,
-                   match_timestamp: Optional[list] = None, telemetry_collector=None, 
+def _compile_exclusions(exclude_patterns, flags: int):
+    """
+    Build a per-line search callable for the -X/--exclude patterns.
+
+    The per-line loops used to re-compile every exclusion string for
+    every line; compiling once here means exclusion costs at most one
+    search() per pattern per line. When every pattern is escape-free the
+    set is fused into a single alternation (one search() total) - with
+    backslashes present, fusion would renumber capturing groups and
+    silently break backreferences, so those fall back to trying each
+    compiled pattern in turn. Invalid patterns are dropped here, once,
+    matching the old behavior of skipping them silently. Returns None
+    when no valid exclusions exist.
+    """
+    compiled = []
+    fusable = True
+    for p in exclude_patterns or []:
+        try:
+            compiled.append(re.compile(p, flags))
+        except re.error:
+            continue
+        if '\\' in p:
+            fusable = False
+    if not compiled:
+        return None
+    if fusable and len(compiled) > 1:
+        # Patterns valid alone can still be invalid joined (e.g. inline
+        # flags mid-pattern) - degrade to the per-pattern list then
+        try:
+            fused = re.compile(
+                '|'.join(f'(?:{c.pattern})' for c in compiled), flags)
+            return fused.search
+        except re.error:
+            pass
+    if len(compiled) == 1:
+        return compiled[0].search
+    searches = [c.search for c in compiled]
+
+    def _search_any(line):
+        for search in searches:
+            m = search(line)
+            if m:
+                return m
+        return None
+    return _search_any
+
+
+def _required_literal(pattern_text: str) -> Optional[str]:
+    """
+    Extract a literal substring that any match of the pattern must contain.
+
+    Used as a cheap `in` pre-filter before invoking the regex engine on
+    each line - C-level substring search rejects most non-matching lines
+    far faster than the regex VM. Returns None when no safe literal can
+    be determined (alternation, groups, escapes, char classes), in which
+    case the caller must always run the full regex.
+    """
+    if not pattern_text:
+        return None
+    # Constructs that make literal extraction unsafe - bail conservatively.
+    # Brace quantifiers bail too: their contents are counts, not literal
+    # text, and treating them as such would reject genuinely matching lines
+    for c in '(|\\[{':
+        if c in pattern_text:
+            return None
+
+    best = ''
+    current = ''
+    for ch in pattern_text:
+        if ch in '^$.?*+}]':
+            if ch in '?*' and current:
+                # Previous char is optional/repeated-from-zero - not required
+                current = current[:-1]
+            if len(current) > len(best):
+                best = current
+            current = ''
+        else:
+            current += ch
+    if len(current) > len(best):
+        best = current
+
+    # Too-short literals filter almost nothing and just add overhead
+    return best if len(best) >= 3 else None
+
+
+# Chunk size for bulk reads from binary streams (matches typical pipe capacity)
+_READ_CHUNK = 65536
+
+
+class StreamCtx:
+    """
+    Shared per-invocation monitoring state.
+
+    One instance is shared by every monitor thread of a run. It replaces
+    the pile of single-element lists that used to be threaded through
+    process_stream - one object, plain attribute access instead of a
+    [0] subscript per touch, and the same mutate-in-place semantics
+    (CPython attribute stores are atomic under the GIL). __slots__ keeps
+    it to fixed-offset storage with no per-instance dict.
+
+    Concurrency model: every counter has a single writer (the stream
+    threads only ever increment their own view under the GIL, and the
+    wait loops only read), so no lock is needed. Cross-thread
+    signaling goes through the `wake` Event rather than polled flags;
+    the booleans stay plain attributes because an Event per field
+    would cost a method call + lock where a GIL-atomic store suffices.
+    """
+    __slots__ = (
+        'match_count', 'post_match_lines', 'match_timestamp',
+        'first_output_seen', 'last_output_time',
+        'first_stdout_time', 'first_stderr_time',
+        'last_stderr_time', 'stderr_seen',
+        'stuck_detected', 'match_type', 'source_file', 'lines_processed',
+        'timed_out', 'timeout_reason', 'detached_pid', 'wake',
+    )
+
+    def __init__(self, source_file: Optional[str] = None,
+                 last_output_time: float = 0.0):
+        self.match_count = 0            # Matches found so far
+        self.post_match_lines = 0       # Lines captured after first match
+        self.match_timestamp = 0.0      # When the first match landed
+        self.first_output_seen = False
+        # Output-idle clocks run on time.monotonic() - NTP steps must not
+        # fire (or defer) the idle/stderr-idle timeouts
+        self.last_output_time = last_output_time
+        self.first_stdout_time = 0.0    # First line on stdout (monotonic)
+        self.first_stderr_time = 0.0    # First line on stderr (monotonic)
+        self.last_stderr_time = 0.0     # For --stderr-idle-exit (monotonic)
+        self.stderr_seen = False
+        self.stuck_detected = False
+        self.match_type = 'none'        # 'success', 'error', or 'none'
+        self.source_file = source_file  # Detected source file, if any
+        self.lines_processed = 0
+        self.timed_out = False
+        self.timeout_reason = ''
+        self.detached_pid = None
+        # Monitors set this when something decision-worthy happens (match
+        # threshold, stuck, timeout, stream EOF) so the wait loops in
+        # run_command_mode can block instead of polling
+        self.wake = threading.Event()
+
+
+class _DemuxReader:
+    """
+    Iterable view of one stream demultiplexed by _StreamDemux.
+
+    Looks enough like a text stream for process_stream: iterating yields
+    decoded lines (with trailing newlines), and `name` is forwarded from
+    the underlying stream when it has one.
+    """
+
+    def __init__(self, line_queue, name=None):
+        self._queue = line_queue
+        if name is not None and isinstance(name, str):
+            self.name = name
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self._queue.get()
+        if line is None:  # EOF sentinel from the pump
+            raise StopIteration
+        return line
+
+
+class _StreamDemux:
+    """
+    Service every monitored child fd from a single selector loop.
+
+    One pump thread waits on epoll/kqueue via selectors.DefaultSelector,
+    does a 64 KiB os.read per ready fd, decodes each chunk once and splits
+    it into lines pushed onto per-fd queues. The per-stream consumers in
+    run_command_mode then iterate pure in-memory queues - N blocking
+    readline loops (one read(2) per line per stream) collapse into one
+    syscall per readiness batch.
+    """
+
+    def __init__(self, ctx=None):
+        self._sel = selectors.DefaultSelector()
+        self._states = {}
+        # Shared StreamCtx: the pump stamps last_output_time once per read
+        # chunk so consumers never need a clock call per line
+        self._ctx = ctx
+
+    def register(self, stream) -> _DemuxReader:
+        """Register a stream's fd; returns the reader its consumer iterates"""
+        fd = stream.fileno()
+        # Non-blocking so one readiness event can be drained completely
+        # (read until EAGAIN) - fewer selector wakeups per burst of output
+        try:
+            os.set_blocking(fd, False)
+        except OSError:
+            pass
+        state = {
+            'queue': queue.SimpleQueue(),
+            'decoder': codecs.getincrementaldecoder('utf-8')(errors='replace'),
+            'residue': '',
+        }
+        self._sel.register(fd, selectors.EVENT_READ, state)
+        self._states[fd] = state
+        return _DemuxReader(state['queue'], getattr(stream, 'name', None))
+
+    def start(self):
+        """Start the pump thread (daemon, dies with the process)"""
+        threading.Thread(target=self._pump, daemon=True).start()
+
+    def _pump(self):
+        sel = self._sel
+        open_fds = set(self._states)
+        ctx = self._ctx
+        _mono = time.monotonic
+        try:
+            while open_fds:
+                # Data readiness wakes select immediately; the timeout only
+                # bounds idle wakeups (EOF of every fd ends the loop, but a
+                # held-open custom fd can idle indefinitely)
+                for key, _ in sel.select(timeout=0.5):
+                    fd = key.fd
+                    state = key.data
+                    # Drain the fd completely for this readiness event
+                    while True:
+                        try:
+                            chunk = os.read(fd, _READ_CHUNK)
+                        except BlockingIOError:
+                            break  # Drained - wait for the next event
+                        except OSError:
+                            chunk = b''
+                        if chunk:
+                            # One timestamp per chunk - every line in it
+                            # shares the stamp for idle-timeout purposes
+                            if ctx is not None:
+                                ctx.last_output_time = _mono()
+                            text = state['decoder'].decode(chunk)
+                            if not text:
+                                continue
+                            lines = (state['residue'] + text).split('\n')
+                            state['residue'] = lines.pop()
+                            put = state['queue'].put
+                            for line in lines:
+                                put(line + '\n')
+                        else:
+                            # EOF - flush decoder residue, signal the consumer
+                            sel.unregister(fd)
+                            open_fds.discard(fd)
+                            tail = state['residue'] + state['decoder'].decode(b'', True)
+                            if tail:
+                                state['queue'].put(tail)
+                            state['queue'].put(None)
+                            break
+        finally:
+            # Never leave a consumer blocked on a dead pump
+            for state in self._states.values():
+                state['queue'].put(None)
+            sel.close()
+
+
+def _iter_lines(stream: IO, ctx: 'Optional[StreamCtx]' = None):
+    """
+    Yield decoded text lines (with trailing newlines) from a stream.
+
+    For binary streams (subprocess pipes) this reads large chunks and
+    decodes each chunk once with an incremental UTF-8 decoder, then splits
+    on '\\n' - one readline + one decode call per line becomes one read +
+    one decode per chunk. Text streams are iterated directly.
+
+    When `ctx` is given, ctx.last_output_time is stamped (monotonic clock)
+    once per read - per chunk for binary streams, per line for text ones -
+    so the consumer loop reads the stamp instead of calling the clock on
+    every line.
+
+    Deliberately decodes here rather than matching bytes downstream:
+    nearly every consumer of a line (log write, passthrough print, stuck
+    normalization, telemetry) needs str anyway, so a bytes-mode pattern
+    fast path would just move the decode later while the bulk decode
+    already rides CPython's ASCII fast path.
+    """
+    if not isinstance(stream, io.BufferedIOBase):
+        # Already-decoded text stream (stdin, fdopen'd custom FDs).
+        # Deliberately not `yield from`: that would propagate generator
+        # finalization as stream.close(), closing stdin out from under
+        # callers that keep reading after an early return
+        if ctx is None:
+            for line in stream:
+                yield line
+        else:
+            _mono = time.monotonic
+            for line in stream:
+                ctx.last_output_time = _mono()
+                yield line
+        return
+
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    read1 = stream.read1
+    residue = ''
+    _mono = time.monotonic
+    while True:
+        chunk = read1(_READ_CHUNK)
+        if not chunk:
+            break
+        if ctx is not None:
+            ctx.last_output_time = _mono()
+        text = decoder.decode(chunk)
+        if not text:
+            continue
+        lines = (residue + text).split('\n')
+        residue = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    residue += decoder.decode(b'', True)
+    if residue:
+        yield residue
+
+
+def _drain_stream(src: IO, sink=None, log_file=None):
+    """
+    Drain a subprocess byte stream in bulk chunks.
+
+    Used where lines are echoed but never matched: copies 64 KiB at a
+    time instead of iterating lines, and echoes raw bytes through the
+    sink's underlying buffer so nothing pays a UTF-8 decode + re-encode
+    round-trip per line. Text is only decoded when a log file needs it
+    (or when the sink has no binary buffer, e.g. a replaced stdout).
+    Errors are swallowed - drains are best-effort by design.
+    """
+    sink_buf = getattr(sink, 'buffer', None) if sink is not None else None
+    try:
+        if log_file is None and sink_buf is not None:
+            # Pure passthrough: byte copy stays in C end to end
+            shutil.copyfileobj(src, sink_buf, _READ_CHUNK)
+            sink_buf.flush()
+            return
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        while True:
+            chunk = src.read(_READ_CHUNK)
+            if not chunk:
+                break
+            if sink_buf is not None:
+                sink_buf.write(chunk)
+                text = None
+            else:
+                text = decoder.decode(chunk)
+                if sink is not None:
+                    sink.write(text)
+            if log_file is not None:
+                log_file.write(decoder.decode(chunk) if text is None else text)
+        tail = decoder.decode(b'', True)
+        if tail:
+            if sink_buf is not None:
+                sink_buf.write(tail.encode('utf-8'))
+            elif sink is not None:
+                sink.write(tail)
+            if log_file is not None:
+                log_file.write(tail)
+        if sink_buf is not None:
+            sink_buf.flush()
+        elif sink is not None:
+            sink.flush()
+        if log_file is not None:
+            log_file.flush()
+    except Exception:
+        pass
+
+
+def process_stream(stream: IO, pattern: Optional[Pattern], args, line_number_offset: int,
+                   ctx: StreamCtx, use_color: bool, stream_name: str = "",
+                   telemetry_collector=None,
                    execution_id: Optional[str] = None, start_time: Optional[float] = None,
-                   source_file_container: Optional[list] = None, post_match_lines: Optional[list] = None,
-                   log_file=None, lines_processed: Optional[list] = None,
-                   success_pattern: Optional[Pattern] = None, match_type: Optional[list] = None,
-                   stuck_detected: Optional[list] = None,
-                   last_stderr_time: Optional[list] = None, stderr_seen: Optional[list] = None):
+                   log_file=None,
+                   success_pattern: Optional[Pattern] = None,
+                   stream_role: Optional[str] = None):
     """
     Process a stream (stdout or stderr) line by line
-    
+
     Args:
         stream: File-like object to read from
         pattern: Compiled regex pattern (can be None if no pattern for this stream)
         args: Argument namespace
         line_number_offset: Starting line number
-        match_count: List with single element tracking match count (mutable)
+        ctx: Shared monitoring state, mutated in place (see StreamCtx)
         use_color: Whether to use color output
         stream_name: Name of stream for debugging ("stdout" or "stderr")
-        last_output_time: List with timestamp of last output (mutable)
-        first_output_seen: List with boolean if first output seen (mutable)
-        first_stream_time: List with timestamp when first output seen on THIS stream (mutable)
-        match_timestamp: List with timestamp of first match (mutable)
         telemetry_collector: Telemetry collector instance for recording match events
         execution_id: Execution ID for telemetry
         start_time: Start time of execution for timestamp offsets
-        source_file_container: List containing source file (mutable, for dynamic detection)
-        post_match_lines: List with count of lines captured after match (mutable)
-        
+        log_file: Open log file to tee lines into, if auto-logging
+        success_pattern: Pattern that marks success (dual-pattern mode)
+        stream_role: 'stdout' or 'stderr' selects which per-stream
+            first-output field to stamp and whether stderr idle tracking
+            applies; None for stdin/custom fds
+
     Returns:
         Number of lines processed
     """
+    is_stderr = stream_role == 'stderr'
+    # Which per-stream first-output field to stamp (cleared once stamped)
+    first_time_attr = {'stdout': 'first_stdout_time',
+                       'stderr': 'first_stderr_time'}.get(stream_role)
+    # Who stamps ctx.last_output_time: the demux pump does it per chunk
+    # for its readers; otherwise _iter_lines stamps as it reads
+    stamp_ctx = None if isinstance(stream, _DemuxReader) else ctx
+    # Passthrough flushing policy, borrowed from grep: on a TTY flush per
+    # line so the output tails live, but into a pipe let the interpreter's
+    # stdout buffer coalesce lines - one write(2) per buffer instead of
+    # per line. Matches and context always flush immediately.
+    try:
+        flush_lines = sys.stdout.isatty()
+    except (AttributeError, ValueError):
+        flush_lines = True
+
     # If no pattern provided for this stream, just pass through
     if pattern is None:
+        # Fast drain: in JSON mode with no log file nothing consumes the
+        # lines (--json suppresses passthrough; --quiet alone does not),
+        # so skip line splitting and decoding entirely - read big chunks
+        # just to keep the output-timing trackers fresh
+        if args.json and log_file is None:
+            try:
+                fd = stream.fileno()
+            except (AttributeError, OSError, io.UnsupportedOperation):
+                fd = None
+            if fd is not None:
+                try:
+                    while True:
+                        chunk = os.read(fd, _READ_CHUNK)
+                        if not chunk:
+                            break
+                        current_time = time.monotonic()
+                        ctx.last_output_time = current_time
+                        if not ctx.first_output_seen:
+                            ctx.first_output_seen = True
+                        if first_time_attr and getattr(ctx, first_time_attr) == 0.0:
+                            setattr(ctx, first_time_attr, current_time)
+                except Exception:
+                    pass
+                return 0
         try:
-            for line in stream:
-                if isinstance(line, bytes):
-                    line = line.decode('utf-8', errors='replace')
-                
-                # Update output tracking
-                current_time = time.time()
-                if last_output_time is not None:
-                    last_output_time[0] = current_time
-                if first_output_seen is not None and not first_output_seen[0]:
-                    first_output_seen[0] = True
+            for line in _iter_lines(stream, stamp_ctx):
+                # Output tracking: the reader already stamped the clock
+                current_time = ctx.last_output_time
+                if not ctx.first_output_seen:
+                    ctx.first_output_seen = True
                 # Track first output time for this specific stream
-                if first_stream_time is not None and first_stream_time[0] == 0.0:
-                    first_stream_time[0] = current_time
-                
-                # Write to log file if enabled
+                if first_time_attr and getattr(ctx, first_time_attr) == 0.0:
+                    setattr(ctx, first_time_attr, current_time)
+
+                # Write to log file if enabled (flushed once on exit, not per line)
                 if log_file:
                     log_file.write(line)
-                    log_file.flush()
-                
+
                 # Always print command output (--quiet only suppresses ee's messages, not command output)
                 # Exception: --json mode, which sets its own output suppression
                 if not args.json:
-                    print(line.rstrip('\n'), flush=True)
+                    print(line.rstrip('\n'), flush=flush_lines)
         except:
             pass
+        finally:
+            try:
+                sys.stdout.flush()
+            except Exception:
+                pass
+            if log_file:
+                try:
+                    log_file.flush()
+                except Exception:
+                    pass
         return 0
     RED = '\033[01;31m' if use_color else ''
     YELLOW = '\033[01;33m' if use_color else ''
     RESET = '\033[0m' if use_color else ''
-    
+
     line_number = line_number_offset
+
+    # Cheap substring pre-filter: skip the regex engine entirely for lines
+    # that can't possibly match (unsafe under IGNORECASE, so skip it there)
+    pat_search = pattern.search
+    required_literal = None
+    if not (getattr(pattern, 'flags', 0) & re.IGNORECASE):
+        required_literal = _required_literal(getattr(pattern, 'pattern', None))
+
+    # Hoist per-line lookups into locals - the loop below runs once per
+    # output line, and LOAD_FAST is much cheaper than attribute lookups
+    # through the argparse Namespace
+    json_mode = args.json
+    quiet = args.quiet
+    line_number_flag = args.line_number
+    fd_prefix = args.fd_prefix
+    invert_match = args.invert_match
+    max_count = args.max_count
+    delay_exit = args.delay_exit
+    delay_exit_after_lines = args.delay_exit_after_lines
+    ignore_case = args.ignore_case
+    _time = time.time
+    wake_set = ctx.wake.set
+    log_write = log_file.write if log_file else None
+    log_flush = log_file.flush if log_file else None
+    last_log_flush = time.monotonic()  # Same clock as ctx.last_output_time
+
+    # Output prefixes: the stream-label segment never changes, and with
+    # line numbers off the whole prefix is a constant - build it once
+    # instead of running two f-strings per printed line
+    # Evaluated once: whether match events will be recorded at all
+    telemetry_on = bool(telemetry_collector and execution_id)
+    # Match events are buffered here and written as one batch when the
+    # stream winds down - one sqlite connection/commit per stream instead
+    # of one per match
+    match_events = []
+    match_events_append = match_events.append
+
+    stream_prefix = f"{YELLOW}[{stream_name}]{RESET} " if stream_name and fd_prefix else ""
+    if line_number_flag:
+        def line_prefix(ln, sep=':'):
+            return f"{ln}{sep}{stream_prefix}"
+    else:
+        def line_prefix(ln, sep=':'):
+            return stream_prefix
+    # With no prefix at all, passthrough lines go out verbatim
+    bare_passthrough = not line_number_flag and not stream_prefix
+    stdout_write = sys.stdout.write
+    stdout_flush = sys.stdout.flush
     
     # Stuck detection: track repeated lines
     repeat_count = 0
@@ -528,15 +1273,37 @@ def process_stream(stream: IO, pattern: Optional[Pattern], args, line_number_off
     max_repeat = getattr(args, 'max_repeat', None)
     strip_timestamps = getattr(args, 'stuck_ignore_timestamps', False)
     stuck_pattern = getattr(args, 'stuck_pattern', None)
+    # Compile once for the per-line normalization below; an invalid
+    # pattern degrades to full-line comparison, as before
+    stuck_re = None
+    if stuck_pattern:
+        try:
+            stuck_re = re.compile(stuck_pattern)
+        except re.error:
+            pass
     
     # Progress detection: track parts that SHOULD change (inverse stuck)
     progress_pattern = getattr(args, 'progress_pattern', None)
     last_progress_value = None
     progress_repeat_count = 0
-    
+    # Compile once here: re.search(string, ...) per line pays the module
+    # cache lookup and flag dispatch on every call
+    if progress_pattern:
+        try:
+            progress_search = re.compile(progress_pattern).search
+        except re.error:
+            progress_search = None
+    else:
+        progress_search = None
+
     # Transition detection: track state machine (forward-only)
     transition_states = getattr(args, 'transition_states', None)
     state_order = transition_states.split('>') if transition_states else []
+    # One word-boundary regex per state, compiled up front
+    state_searches = [
+        (state, re.compile(r'\b' + re.escape(state) + r'\b').search)
+        for state in state_order
+    ]
     last_state_index = -1
     
     # Expect patterns: allowlist/coverage detection
@@ -549,83 +1316,147 @@ def process_stream(stream: IO, pattern: Optional[Pattern], args, line_number_off
     # Compile expect and unexpected patterns
     expect_compiled = []
     if expect_patterns:
-        import re
         for ep in expect_patterns:
             try:
-                flags = re.IGNORECASE if args.ignore_case else 0
+                flags = re.IGNORECASE if ignore_case else 0
                 expect_compiled.append((ep, re.compile(ep, flags)))
             except re.error as e:
                 print(f"Warning: Invalid expect pattern '{ep}': {e}", file=sys.stderr)
     
     unexpected_compiled = []
     if unexpected_patterns:
-        import re
         for up in unexpected_patterns:
             try:
-                flags = re.IGNORECASE if args.ignore_case else 0
+                flags = re.IGNORECASE if ignore_case else 0
                 unexpected_compiled.append((up, re.compile(up, flags)))
             except re.error as e:
                 print(f"Warning: Invalid unexpected pattern '{up}': {e}", file=sys.stderr)
     
+    # Exclusions compiled once for the stream (fused into a single
+    # alternation when that preserves their semantics)
+    exclude_search = _compile_exclusions(getattr(args, 'exclude_patterns', None),
+                                         re.IGNORECASE if ignore_case else 0)
+
     # Track which expect patterns have been seen (for --expect-all)
     expect_seen = {pattern_str: False for pattern_str, _ in expect_compiled}
     unexpected_lines = []  # Collect unexpected lines for warn/error modes
     
-    # Context buffer for capturing lines before matches (like grep -B)
-    context_buffer = []
+    # Context buffer for capturing lines before matches (like grep -B).
+    # deque(maxlen=N) evicts the oldest entry in O(1) instead of the O(N)
+    # shift that list.pop(0) costs on every line
     context_size = getattr(args, 'before_context', 0)  # Number of lines to keep
+    context_buffer = deque(maxlen=context_size) if context_size > 0 else deque()
     
     # Try to get filename from stream handle itself
-    if source_file_container and not source_file_container[0]:
+    if not ctx.source_file:
         try:
             stream_name_attr = getattr(stream, 'name', None)
             if stream_name_attr and isinstance(stream_name_attr, str):
                 # Valid if it's not a generic stream name or file descriptor number
                 if (stream_name_attr not in ['<stdin>', '<stdout>', '<stderr>'] and 
                     not stream_name_attr.isdigit()):
-                    source_file_container[0] = stream_name_attr
+                    ctx.source_file = stream_name_attr
         except:
             pass
     
+    # Whether this stream still needs its first-output stamp - flips off
+    # once stamped so the hot loop skips the getattr afterwards
+    need_stream_first = first_time_attr is not None
+
+    # Fast path for the plain grep-like configuration: no stuck/progress
+    # detection, context, exclusions, dual patterns, invert, telemetry,
+    # logging, JSON, color or delay window. The general loop below pays a
+    # dozen feature checks per line even when every feature is off; this
+    # one does only stamp, search, write
+    if (not max_repeat and context_size == 0 and exclude_search is None
+            and not expect_compiled and not unexpected_compiled
+            and success_pattern is None and not invert_match
+            and not telemetry_on and log_write is None and not json_mode
+            and not use_color and (delay_exit is None or delay_exit == 0)):
+        try:
+            for line in _iter_lines(stream, stamp_ctx):
+                current_time = ctx.last_output_time
+                if not ctx.first_output_seen:
+                    ctx.first_output_seen = True
+                if need_stream_first and getattr(ctx, first_time_attr) == 0.0:
+                    setattr(ctx, first_time_attr, current_time)
+                    need_stream_first = False
+                if is_stderr:
+                    ctx.last_stderr_time = current_time
+                    ctx.stderr_seen = True
+                line_number += 1
+                has_newline = line.endswith('\n')
+                line_stripped = line[:-1] if has_newline else line
+                ctx.lines_processed += 1
+                if ((required_literal is None or required_literal in line_stripped)
+                        and pat_search(line_stripped)):
+                    ctx.match_count += 1
+                    if ctx.match_timestamp == 0:
+                        ctx.match_timestamp = current_time
+                    if not bare_passthrough:
+                        stdout_write(line_prefix(line_number))
+                    stdout_write(line if has_newline else line + '\n')
+                    stdout_flush()
+                    if ctx.match_count >= max_count:
+                        wake_set()
+                        return line_number - line_number_offset
+                else:
+                    if not bare_passthrough:
+                        stdout_write(line_prefix(line_number))
+                    stdout_write(line)
+                    if not has_newline:
+                        stdout_write('\n')
+                    if flush_lines:
+                        stdout_flush()
+        except TimeoutError:
+            raise
+        except Exception as e:
+            if not quiet:
+                print(f"❌ Error processing {stream_name}: {e}", file=sys.stderr, flush=True)
+        finally:
+            try:
+                sys.stdout.flush()
+            except Exception:
+                pass
+        return line_number - line_number_offset
+
     try:
-        for line in stream:
-            if isinstance(line, bytes):
-                line = line.decode('utf-8', errors='replace')
-            
-            # Update output tracking
-            current_time = time.time()
-            if last_output_time is not None:
-                last_output_time[0] = current_time
-            if first_output_seen is not None and not first_output_seen[0]:
-                first_output_seen[0] = True
+        for line in _iter_lines(stream, stamp_ctx):
+            # Output tracking: the reader stamped ctx.last_output_time when
+            # it pulled this chunk off the pipe - no clock call per line
+            current_time = ctx.last_output_time
+            if not ctx.first_output_seen:
+                ctx.first_output_seen = True
             # Track first output time for this specific stream
-            if first_stream_time is not None and first_stream_time[0] == 0.0:
-                first_stream_time[0] = current_time
-            
+            if need_stream_first and getattr(ctx, first_time_attr) == 0.0:
+                setattr(ctx, first_time_attr, current_time)
+                need_stream_first = False
+
             # Track stderr-specific timing (for --stderr-idle-exit)
-            # Update if last_stderr_time is provided (indicates this is stderr stream)
-            if last_stderr_time is not None:
-                last_stderr_time[0] = current_time
-                if stderr_seen is not None:
-                    stderr_seen[0] = True
-            
+            if is_stderr:
+                ctx.last_stderr_time = current_time
+                ctx.stderr_seen = True
+
             line_number += 1
-            line_stripped = line.rstrip('\n')
-            
+            # Chunk-split lines carry at most one trailing newline - a
+            # slice beats rstrip's character-set scan (only the final
+            # line of a stream can arrive without one)
+            has_newline = line.endswith('\n')
+            line_stripped = line[:-1] if has_newline else line
+
             # Track lines for progress indicator
-            if lines_processed is not None:
-                lines_processed[0] += 1
+            ctx.lines_processed += 1
             
             # Stuck detection: check if line is repeating
             if max_repeat:
                 # Normalize line for comparison
-                normalized_line = normalize_line_for_comparison(line_stripped, strip_timestamps, stuck_pattern)
+                normalized_line = normalize_line_for_comparison(line_stripped, strip_timestamps, stuck_re)
                 
                 if normalized_line == last_normalized_line and normalized_line:
                     repeat_count += 1
                     if repeat_count >= max_repeat:
                         # Stuck detected!
-                        if not args.quiet:
+                        if not quiet:
                             detection_msg = []
                             if stuck_pattern:
                                 detection_msg.append("watching pattern")
@@ -637,18 +1468,17 @@ def process_stream(stream: IO, pattern: Optional[Pattern], args, line_number_off
                                 print(f"   Watched part: {normalized_line}", file=sys.stderr)
                             print(f"   Full line: {line_stripped}", file=sys.stderr)
                         # Set stuck flag and break
-                        if stuck_detected is not None:
-                            stuck_detected[0] = True
+                        ctx.stuck_detected = True
+                        wake_set()
                         break
                 else:
                     repeat_count = 1
                     last_normalized_line = normalized_line
             
             # Progress detection: check if parts that SHOULD change are NOT changing
-            if max_repeat and progress_pattern:
+            if max_repeat and progress_search:
                 try:
-                    import re
-                    match = re.search(progress_pattern, line_stripped)
+                    match = progress_search(line_stripped)
                     if match:
                         current_progress = match.group(0)
                         
@@ -656,13 +1486,13 @@ def process_stream(stream: IO, pattern: Optional[Pattern], args, line_number_off
                             progress_repeat_count += 1
                             if progress_repeat_count >= max_repeat:
                                 # No progress detected!
-                                if not args.quiet:
+                                if not quiet:
                                     print(f"\n🔁 No progress detected: Counters stuck at \"{current_progress}\" ({progress_repeat_count} times)", file=sys.stderr)
                                     print(f"   Full line: {line_stripped}", file=sys.stderr)
                                     print(f"   Expected: This part should change over time", file=sys.stderr)
                                 # Set stuck flag and break
-                                if stuck_detected is not None:
-                                    stuck_detected[0] = True
+                                ctx.stuck_detected = True
+                                wake_set()
                                 break
                         else:
                             progress_repeat_count = 1
@@ -673,22 +1503,21 @@ def process_stream(stream: IO, pattern: Optional[Pattern], args, line_number_off
             # Transition detection: check if state moved backward
             if max_repeat and transition_states and state_order:
                 try:
-                    import re
                     # Try to find any of the states in the line
-                    for state in state_order:
-                        if re.search(r'\b' + re.escape(state) + r'\b', line_stripped):
+                    for state, state_search in state_searches:
+                        if state_search(line_stripped):
                             current_index = state_order.index(state)
                             
                             # Check if we went backward
                             if last_state_index >= 0 and current_index < last_state_index:
                                 # Regression detected!
-                                if not args.quiet:
+                                if not quiet:
                                     print(f"\n🔴 Regression detected: State transition {state_order[last_state_index]} → {state}", file=sys.stderr)
                                     print(f"   Full line: {line_stripped}", file=sys.stderr)
                                     print(f"   Expected: Forward progress only ({' → '.join(state_order)})", file=sys.stderr)
                                 # Set stuck flag and break
-                                if stuck_detected is not None:
-                                    stuck_detected[0] = True
+                                ctx.stuck_detected = True
+                                wake_set()
                                 break
                             
                             last_state_index = current_index
@@ -699,26 +1528,9 @@ def process_stream(stream: IO, pattern: Optional[Pattern], args, line_number_off
             # Maintain context buffer (ring buffer of last N lines) for -B/--before-context
             if context_size > 0:
                 context_buffer.append((line_number, line_stripped))
-                if len(context_buffer) > context_size:
-                    context_buffer.pop(0)
             
-            # Check exclusion patterns first (if any)
-            excluded = False
-            if hasattr(args, 'exclude_patterns') and args.exclude_patterns:
-                for exclude_pattern_str in args.exclude_patterns:
-                    try:
-                        # Compile exclusion pattern with same flags as main pattern
-                        flags = re.IGNORECASE if args.ignore_case else 0
-                        exclude_pattern = re.compile(exclude_pattern_str, flags)
-                        if exclude_pattern.search(line_stripped):
-                            excluded = True
-                            break
-                    except re.error:
-                        # Invalid exclusion pattern - skip it
-                        pass
-            
-            # If line is excluded, skip pattern matching
-            if excluded:
+            # Check exclusion patterns first (if any) - precompiled above
+            if exclude_search is not None and exclude_search(line_stripped):
                 continue
             
             # Check unexpected patterns (blocklist) - immediate action
@@ -726,17 +1538,16 @@ def process_stream(stream: IO, pattern: Optional[Pattern], args, line_number_off
                 for unexpected_str, unexpected_re in unexpected_compiled:
                     if unexpected_re.search(line_stripped):
                         # Unexpected pattern found!
-                        if not args.quiet:
+                        if not quiet:
                             print(f"\n⛔ Unexpected output detected!", file=sys.stderr)
                             print(f"   Pattern: {unexpected_str}", file=sys.stderr)
                             print(f"   Line: {line_stripped}", file=sys.stderr)
                         
                         # Exit immediately (exit code 5 for unexpected output)
-                        if stuck_detected is not None:
-                            stuck_detected[0] = True  # Use stuck flag to trigger exit
+                        ctx.stuck_detected = True  # Use stuck flag to trigger exit
+                        wake_set()
                         # Set a special marker that this was unexpected
-                        if match_type is not None:
-                            match_type[0] = 'unexpected'
+                        ctx.match_type = 'unexpected'
                         return 5  # Exit code 5 = unexpected output
             
             # Check expect patterns (allowlist)
@@ -757,7 +1568,7 @@ def process_stream(stream: IO, pattern: Optional[Pattern], args, line_number_off
                     # Handle unexpected output based on --on-unexpected
                     if on_unexpected == 'exit' or expect_only:
                         # Immediate termination
-                        if not args.quiet:
+                        if not quiet:
                             print(f"\n⛔ Unexpected output detected (not in allowlist)!", file=sys.stderr)
                             print(f"   Line {line_number}: {line_stripped}", file=sys.stderr)
                             print(f"   Expected patterns:", file=sys.stderr)
@@ -767,7 +1578,7 @@ def process_stream(stream: IO, pattern: Optional[Pattern], args, line_number_off
                     
                     elif on_unexpected == 'warn':
                         # Print warning but continue
-                        if not args.quiet:
+                        if not quiet:
                             print(f"⚠️  Unexpected line {line_number}: {line_stripped}", file=sys.stderr)
                     
                     # For 'error' mode, collect and report at end
@@ -777,14 +1588,14 @@ def process_stream(stream: IO, pattern: Optional[Pattern], args, line_number_off
                 success_match = success_pattern.search(line_stripped)
                 if success_match:
                     # Success pattern matched! Mark as success (first match wins)
-                    if match_type is not None and match_type[0] == 'none':
-                        match_type[0] = 'success'
-                    match_count[0] += 1
-                    current_time = time.time()
+                    if ctx.match_type == 'none':
+                        ctx.match_type = 'success'
+                    ctx.match_count += 1
+                    current_time = _time()
                     
                     # Record first match timestamp
-                    if match_timestamp is not None and match_timestamp[0] == 0:
-                        match_timestamp[0] = current_time
+                    if ctx.match_timestamp == 0:
+                        ctx.match_timestamp = current_time
                     
                     # Use success_match as the match object for highlighting/recording
                     match = success_match
@@ -793,87 +1604,96 @@ def process_stream(stream: IO, pattern: Optional[Pattern], args, line_number_off
                     # Note: Don't check invert_match for success patterns
                 else:
                     # No success match, check error pattern
-                    match = pattern.search(line_stripped) if pattern else None
+                    if required_literal is None or required_literal in line_stripped:
+                        match = pat_search(line_stripped) if pattern else None
+                    else:
+                        match = None
                     is_match = match is not None
                     
                     # Invert if requested (only applies to error pattern)
-                    if args.invert_match:
+                    if invert_match:
                         is_match = not is_match
                     
                     # Mark as error (first match wins)
-                    if is_match and match_type is not None and match_type[0] == 'none':
-                        match_type[0] = 'error'
+                    if is_match and ctx.match_type == 'none':
+                        ctx.match_type = 'error'
             else:
                 # Traditional mode or error-only mode: check main pattern
-                match = pattern.search(line_stripped)
+                if required_literal is None or required_literal in line_stripped:
+                    match = pat_search(line_stripped)
+                else:
+                    match = None
                 is_match = match is not None
                 
                 # Invert if requested
-                if args.invert_match:
+                if invert_match:
                     is_match = not is_match
                 
                 # Mark as error in traditional mode (first match wins)
-                if is_match and match_type is not None and match_type[0] == 'none':
-                    match_type[0] = 'error'
+                if is_match and ctx.match_type == 'none':
+                    ctx.match_type = 'error'
             
             if is_match:
-                match_count[0] += 1
-                current_time = time.time()
+                ctx.match_count += 1
+                current_time = _time()
                 
                 # Record first match timestamp for delay-exit
-                if match_timestamp is not None and match_timestamp[0] == 0:
-                    match_timestamp[0] = current_time
+                if ctx.match_timestamp == 0:
+                    ctx.match_timestamp = current_time
                 
-                # Record match event to telemetry
-                if telemetry_collector and execution_id and not args.invert_match and match:
+                # Wake the wait loop - it decides whether to exit now or
+                # sit out the delay-exit window
+                if ctx.match_count >= max_count:
+                    wake_set()
+                
+                # Record match event to telemetry - the match.group(0) /
+                # context-join work below only happens when a collector
+                # will actually consume it
+                if telemetry_on and not invert_match and match:
                     try:
                         # Get current source file (may have been updated dynamically)
-                        current_source_file = source_file_container[0] if source_file_container else None
+                        current_source_file = ctx.source_file
                         
                         match_data = {
-                            'match_number': match_count[0],
+                            'match_number': ctx.match_count,
                             'timestamp_offset': current_time - start_time if start_time else 0,
                             'stream_source': stream_name or 'stdin',
                             'source_file': current_source_file,
                             'line_number': line_number,
                             'line_content': line_stripped,
                             'matched_substring': match.group(0) if match else '',
-                            'context_before': '\n'.join(context_buffer[:-1]) if len(context_buffer) > 1 else '',
+                            'context_before': '\n'.join(
+                                ctx_line for _, ctx_line in list(context_buffer)[:-1]
+                            ) if len(context_buffer) > 1 else '',
                             'context_after': ''  # Will be filled by subsequent lines if needed
                         }
-                        telemetry_collector.record_match_event(execution_id, match_data)
+                        match_events_append(match_data)
                     except Exception:
                         # Silently fail - don't disrupt execution
                         pass
                 
-                # Write to log file if enabled (always write, even if quiet)
-                if log_file:
-                    log_file.write(line)
-                    log_file.flush()
+                # Write to log file if enabled (always write, even if quiet).
+                # Matched lines flush immediately so the match context is
+                # durable even if we exit right after
+                if log_write:
+                    log_write(line)
+                    log_flush()
                 
                 # Output the line (--quiet only suppresses ee's messages, not command output)
-                if not args.json:
+                if not json_mode:
                     # Print context lines before the match (like grep -B)
                     if context_size > 0 and len(context_buffer) > 0:
                         # Print all buffered lines except the current one (which we'll print below)
-                        for ctx_line_num, ctx_line in context_buffer[:-1]:
-                            ctx_prefix = ""
-                            if args.line_number:
-                                ctx_prefix = f"{ctx_line_num}-"  # Use '-' for context lines like grep
-                            if stream_name and args.fd_prefix:
-                                ctx_prefix += f"{YELLOW}[{stream_name}]{RESET} "
-                            print(f"{ctx_prefix}{ctx_line}", flush=True)
+                        for ctx_line_num, ctx_line in list(context_buffer)[:-1]:
+                            # Use '-' for context lines like grep
+                            print(f"{line_prefix(ctx_line_num, '-')}{ctx_line}", flush=True)
                         # Clear buffer after printing to avoid reprinting on next match
                         context_buffer.clear()
                     
-                    prefix = ""
-                    if args.line_number:
-                        prefix = f"{line_number}:"
-                    if stream_name and args.fd_prefix:
-                        prefix += f"{YELLOW}[{stream_name}]{RESET} "
-                    
+                    prefix = line_prefix(line_number)
+
                     # Highlight matched text (only for non-inverted matches)
-                    if not args.invert_match and match and use_color:
+                    if not invert_match and match and use_color:
                         start, end = match.span()
                         highlighted = (line_stripped[:start] + RED + 
                                      line_stripped[start:end] + RESET + 
@@ -883,63 +1703,98 @@ def process_stream(stream: IO, pattern: Optional[Pattern], args, line_number_off
                         print(f"{prefix}{line_stripped}", flush=True)
                 
                 # Check if we've reached max matches
-                if match_count[0] >= args.max_count:
+                if ctx.match_count >= max_count:
                     # In command mode with delay, let the main loop handle termination
                     # In pipe mode or with 0 delay, exit immediately
-                    if args.delay_exit is None or args.delay_exit == 0:
+                    if delay_exit is None or delay_exit == 0:
                         # No delay, exit immediately
                         return line_number - line_number_offset
-                    elif match_timestamp and match_timestamp[0] > 0:
+                    elif ctx.match_timestamp > 0:
                         # Check if delay has expired OR if we've captured enough lines
-                        elapsed = time.time() - match_timestamp[0]
-                        if elapsed >= args.delay_exit:
+                        elapsed = _time() - ctx.match_timestamp
+                        if elapsed >= delay_exit:
                             # Delay expired, stop reading
                             return line_number - line_number_offset
-                        if post_match_lines and post_match_lines[0] >= args.delay_exit_after_lines:
+                        if ctx.post_match_lines >= delay_exit_after_lines:
                             # Captured enough lines, stop reading
                             return line_number - line_number_offset
                     # Otherwise continue reading (still within delay period)
             else:
-                # Non-matching line - write to log and pass through if not quiet
-                # Write to log file if enabled
-                if log_file:
-                    log_file.write(line)
-                    log_file.flush()
+                # Non-matching line - write to log and pass through if not quiet.
+                # No per-line flush: that costs a write(2) syscall per line.
+                # Flush on a size-or-time threshold so tail -f on the log
+                # stays useful: every 1024 lines at full throughput, or
+                # within 0.2s for trickle streams. current_time is the
+                # already-sampled chunk stamp - no extra clock call here
+                if log_write:
+                    log_write(line)
+                    if (line_number & 1023 == 0
+                            or current_time - last_log_flush >= 0.2):
+                        log_flush()
+                        last_log_flush = current_time
                 
                 # Increment post-match line counter if we've matched
-                if match_count[0] >= args.max_count and post_match_lines is not None:
-                    post_match_lines[0] += 1
+                if ctx.match_count >= max_count:
+                    ctx.post_match_lines += 1
                     # Check if we've exceeded line limit
-                    if post_match_lines[0] >= args.delay_exit_after_lines:
-                        if not args.json:
-                            prefix = ""
-                            if args.line_number:
-                                prefix = f"{line_number}:"
-                            if stream_name and args.fd_prefix:
-                                prefix += f"{YELLOW}[{stream_name}]{RESET} "
-                            print(f"{prefix}{line_stripped}", flush=True)
+                    if ctx.post_match_lines >= delay_exit_after_lines:
+                        if not json_mode:
+                            print(f"{line_prefix(line_number)}{line_stripped}", flush=True)
                         return line_number - line_number_offset
                 
-                if not args.json:
-                    prefix = ""
-                    if args.line_number:
-                        prefix = f"{line_number}:"
-                    if stream_name and args.fd_prefix:
-                        prefix += f"{YELLOW}[{stream_name}]{RESET} "
-                    print(f"{prefix}{line_stripped}", flush=True)
-    
+                if not json_mode:
+                    # Raw writes instead of print(f"..."): skips building
+                    # the concatenated line, and the common no-prefix case
+                    # is a single write of the string we already hold
+                    if not bare_passthrough:
+                        stdout_write(line_prefix(line_number))
+                    stdout_write(line)
+                    if not has_newline:
+                        stdout_write('\n')
+                    if flush_lines:
+                        stdout_flush()
+
     except TimeoutError:
         # Re-raise timeout errors so they can be handled by main()
         raise
     except Exception as e:
-        if not args.quiet:
+        if not quiet:
             print(f"❌ Error processing {stream_name}: {e}", file=sys.stderr, flush=True)
-    
+    finally:
+        # Push any buffered output and log lines out before the stream
+        # winds down
+        try:
+            sys.stdout.flush()
+        except Exception:
+            pass
+        if log_flush:
+            try:
+                log_flush()
+            except Exception:
+                pass
+        if match_events:
+            # Hand the batch to the background telemetry writer: the
+            # enqueue is cheap enough to beat process teardown, and the
+            # atexit flush gives the actual sqlite write a bounded window
+            def _write_match_batch(coll=telemetry_collector,
+                                   eid=execution_id, events=match_events):
+                record_batch = getattr(coll, 'record_match_events', None)
+                if record_batch is not None:
+                    record_batch(eid, events)
+                else:
+                    # Older collectors: fall back to per-event writes
+                    for match_data in events:
+                        coll.record_match_event(eid, match_data)
+            try:
+                _enqueue_telemetry_call(_write_match_batch)
+            except Exception:
+                pass
+
     # Check --expect-all coverage: were all expected patterns seen?
     if expect_all and expect_compiled:
         missing_patterns = [pattern_str for pattern_str, seen in expect_seen.items() if not seen]
         if missing_patterns:
-            if not args.quiet:
+            if not quiet:
                 print(f"\n❌ Coverage check failed: Not all expected patterns were seen!", file=sys.stderr)
                 print(f"   Missing patterns:", file=sys.stderr)
                 for mp in missing_patterns:
@@ -948,7 +1803,7 @@ def process_stream(stream: IO, pattern: Optional[Pattern], args, line_number_off
     
     # Check --on-unexpected error mode: report collected unexpected lines
     if on_unexpected == 'error' and unexpected_lines:
-        if not args.quiet:
+        if not quiet:
             print(f"\n❌ Unexpected output detected ({len(unexpected_lines)} line(s)):", file=sys.stderr)
             for line_num, line_content in unexpected_lines[:10]:  # Show first 10
                 print(f"   Line {line_num}: {line_content}", file=sys.stderr)
@@ -974,7 +1829,6 @@ def write_pid_file(pid: int, pid_file_path: str, quiet: bool = False):
 def get_process_group_id(pid: int) -> Optional[int]:
     """Get process group ID for a PID"""
     try:
-        import os
         return os.getpgid(pid)
     except:
         return None
@@ -983,8 +1837,6 @@ def get_process_group_id(pid: int) -> Optional[int]:
 def kill_process_group(pgid: int):
     """Kill entire process group"""
     try:
-        import os
-        import signal
         os.killpg(pgid, signal.SIGTERM)
         time.sleep(1)
         try:
@@ -1023,10 +1875,12 @@ def run_command_mode(args, default_pattern: Pattern, use_color: bool, telemetry_
     stderr_log_file = None
     if stdout_log_path:
         try:
-            # Open in append mode if requested (like tee -a)
+            # Open in append mode if requested (like tee -a).
+            # Large user-space buffer: lines accumulate in memory and hit
+            # the kernel in big writes instead of one write(2) per line
             file_mode = 'a' if getattr(args, 'append', False) else 'w'
-            stdout_log_file = open(stdout_log_path, file_mode)
-            stderr_log_file = open(stderr_log_path, file_mode)
+            stdout_log_file = open(stdout_log_path, file_mode, buffering=1 << 20)
+            stderr_log_file = open(stderr_log_path, file_mode, buffering=1 << 20)
             
             # Display "Logging to:" message unless quiet or JSON mode
             if not args.quiet and not args.json:
@@ -1056,37 +1910,10 @@ def run_command_mode(args, default_pattern: Pattern, use_color: bool, telemetry_
             stdout_log_file = None
             stderr_log_file = None
     
-    match_count = [0]  # Use list to make it mutable across threads
-    match_type = ['none']  # Track which type matched: 'success', 'error', or 'none'
-    post_match_lines = [0]  # Track lines captured after match
-    timed_out = [False]  # Track if we timed out
-    timeout_reason = [""]  # Track why we timed out
-    detached_pid = [None]  # Track PID if we detach from subprocess
-    stuck_detected = [False]  # Track if stuck detection triggered
-    
-    # Track output timing
+    # Shared monitoring state, mutated in place by all monitor threads
     start_time = telemetry_start_time or time.time()
-    last_output_time = [start_time]  # Shared across all streams
-    first_output_seen = [False]
-    first_stdout_time = [0.0]  # Timestamp when first stdout line occurs
-    first_stderr_time = [0.0]  # Timestamp when first stderr line occurs
-    last_stderr_time = [0.0]  # Timestamp of last stderr output
-    stderr_seen = [False]  # Track if we've seen any stderr output
-    match_timestamp = [0]  # Timestamp of first match (for delay-exit)
-    
-    # Source file container (mutable, can be updated from output)
-    source_file_container = [initial_source_file]
-    
-    # Statistics for JSON output
-    statistics = {
-        'lines_processed': [0],  # Total lines
-        'bytes_processed': [0],  # Total bytes
-        'time_to_first_output': [None],  # Time to first line
-        'time_to_match': [None],  # Time to first match
-        'matched_line': [None],  # The line that matched
-        'matched_line_number': [None],  # Line number of match
-    }
-    
+    ctx = StreamCtx(source_file=initial_source_file, last_output_time=time.monotonic())
+
     # Track pipes and file descriptors for cleanup
     pipes_to_close = []
     
@@ -1106,13 +1933,14 @@ def run_command_mode(args, default_pattern: Pattern, use_color: bool, telemetry_
     
     def timeout_callback(reason="timeout"):
         """Called when timeout expires"""
-        timed_out[0] = True
-        timeout_reason[0] = reason
+        ctx.timed_out = True
+        ctx.timeout_reason = reason
+        ctx.wake.set()
         if process.poll() is None:  # Process still running
             # Check if detach-on-timeout is enabled
             if args.detach and args.detach_on_timeout:
                 # Detach instead of killing
-                detached_pid[0] = process.pid
+                ctx.detached_pid = process.pid
                 if not args.quiet:
                     if args.detach_group:
                         pgid = get_process_group_id(process.pid)
@@ -1130,35 +1958,24 @@ def run_command_mode(args, default_pattern: Pattern, use_color: bool, telemetry_
                     write_pid_file(process.pid, args.pid_file, args.quiet)
             else:
                 # Normal timeout: kill subprocess
-                try:
-                    process.terminate()
-                    try:
-                        process.wait(timeout=1)
-                    except subprocess.TimeoutExpired:
-                        process.kill()
-                except (PermissionError, OSError):
-                    # In sandbox or restricted environment, try kill directly
-                    try:
-                        process.kill()
-                    except:
-                        pass  # Process may have already exited
+                _shutdown_process(process)
     
     def check_output_timeouts():
         """Monitor thread to check for idle and first-output timeouts"""
-        start_time = time.time()
-        
-        while process.poll() is None and not timed_out[0]:
-            current_time = time.time()
-            
+        start_time = time.monotonic()
+
+        while process.poll() is None and not ctx.timed_out:
+            current_time = time.monotonic()
+
             # Check first output timeout
-            if args.first_output_timeout and not first_output_seen[0]:
+            if args.first_output_timeout and not ctx.first_output_seen:
                 if current_time - start_time >= args.first_output_timeout:
                     timeout_callback(f"no first output after {args.first_output_timeout}s")
                     break
             
             # Check idle timeout
             if args.idle_timeout:
-                time_since_output = current_time - last_output_time[0]
+                time_since_output = current_time - ctx.last_output_time
                 if time_since_output >= args.idle_timeout:
                     timeout_callback(f"no output for {args.idle_timeout}s")
                     break
@@ -1168,27 +1985,23 @@ def run_command_mode(args, default_pattern: Pattern, use_color: bool, telemetry_
     
     def check_stderr_idle():
         """Monitor thread to check for stderr idle timeout"""
-        while process.poll() is None and not timed_out[0]:
+        while process.poll() is None and not ctx.timed_out:
             # Wait until we've seen stderr output
-            if not stderr_seen[0]:
+            if not ctx.stderr_seen:
                 time.sleep(0.1)
                 continue
             
-            current_time = time.time()
-            time_since_stderr = current_time - last_stderr_time[0]
+            current_time = time.monotonic()
+            time_since_stderr = current_time - ctx.last_stderr_time
             
             # If stderr has been idle for the specified time, exit
             if time_since_stderr >= args.stderr_idle_exit:
-                timed_out[0] = True
-                timeout_reason[0] = f"stderr idle for {args.stderr_idle_exit}s"
+                ctx.timed_out = True
+                ctx.timeout_reason = f"stderr idle for {args.stderr_idle_exit}s"
+                ctx.wake.set()
                 if not args.quiet:
                     print(f"\n⏸️  Stderr idle: No stderr output for {args.stderr_idle_exit}s (error messages complete)", file=sys.stderr)
-                if process.poll() is None:
-                    process.terminate()
-                    try:
-                        process.wait(timeout=1)
-                    except subprocess.TimeoutExpired:
-                        process.kill()
+                _shutdown_process(process)
                 break
             
             # Check every 100ms
@@ -1224,14 +2037,16 @@ def run_command_mode(args, default_pattern: Pattern, use_color: bool, telemetry_
         
         # Set environment variables for unbuffering (inherits parent env, then overrides)
         # This ensures child processes (multiprocessing, subprocesses) also unbuffer
-        import os as os_module
-        env = os_module.environ.copy()
+        env = os.environ.copy()
         env['PYTHONUNBUFFERED'] = '1'  # Python: unbuffer stdout/stderr
         env['RUBY_FLUSH'] = '1'        # Ruby: auto-flush output
         env['PERLIO'] = ':unix'        # Perl: unbuffered I/O
         subprocess_kwargs['env'] = env
         
-        # If we have custom FDs, we need to use preexec_fn to set them up
+        # If we have custom FDs, we need to use preexec_fn to set them up.
+        # Note: preexec_fn forces CPython onto the fork+exec spawn path;
+        # runs without --fds keep the kwargs posix_spawn-compatible so the
+        # interpreter can skip the fork-time page-table copy of the parent
         if fd_pipes:
             def setup_fds():
                 """Setup custom file descriptors in child process"""
@@ -1267,6 +2082,9 @@ def run_command_mode(args, default_pattern: Pattern, use_color: bool, telemetry_
             if args.verbose:
                 print(f"[earlyexit] Wrapping command with: {' '.join(stdbuf_args)}", file=sys.stderr)
         
+        if args.verbose and not fd_pipes and not getattr(subprocess, '_USE_POSIX_SPAWN', False):
+            print("[earlyexit] posix_spawn unavailable; child started via fork+exec", file=sys.stderr)
+
         # Start the subprocess
         process = subprocess.Popen(command_to_run, **subprocess_kwargs)
         
@@ -1285,8 +2103,8 @@ def run_command_mode(args, default_pattern: Pattern, use_color: bool, telemetry_
             open_files = inspect_process_fds(process.pid, delay=0.05)
             if open_files:
                 # Prefer FD inspection over command arg inference
-                if not source_file_container[0]:
-                    source_file_container[0] = open_files[0]
+                if not ctx.source_file:
+                    ctx.source_file = open_files[0]
                     if args.verbose:
                         print(f"[earlyexit] Detected source file from subprocess FDs: {open_files[0]}", file=sys.stderr)
                 else:
@@ -1295,16 +2113,16 @@ def run_command_mode(args, default_pattern: Pattern, use_color: bool, telemetry_
                     script_exts = ['.py', '.js', '.sh', '.rb', '.pl']
                     data_exts = ['.txt', '.csv', '.json', '.xml', '.yaml', '.yml', '.log']
                     
-                    current_is_script = any(source_file_container[0].endswith(ext) for ext in script_exts)
+                    current_is_script = any(ctx.source_file.endswith(ext) for ext in script_exts)
                     fd_is_data = any(open_files[0].endswith(ext) for ext in data_exts)
                     
                     if current_is_script and fd_is_data:
                         # Override script with data file
                         if args.verbose:
-                            print(f"[earlyexit] Overriding {source_file_container[0]} with FD-detected data file: {open_files[0]}", file=sys.stderr)
-                        source_file_container[0] = open_files[0]
-                    elif args.verbose and open_files[0] != source_file_container[0]:
-                        print(f"[earlyexit] FD inspection found {open_files[0]}, keeping {source_file_container[0]}", file=sys.stderr)
+                            print(f"[earlyexit] Overriding {ctx.source_file} with FD-detected data file: {open_files[0]}", file=sys.stderr)
+                        ctx.source_file = open_files[0]
+                    elif args.verbose and open_files[0] != ctx.source_file:
+                        print(f"[earlyexit] FD inspection found {open_files[0]}, keeping {ctx.source_file}", file=sys.stderr)
         
         # Set up timeout timer if requested
         timeout_timer = None
@@ -1312,11 +2130,38 @@ def run_command_mode(args, default_pattern: Pattern, use_color: bool, telemetry_
             timeout_timer = threading.Timer(args.timeout, lambda: timeout_callback("timeout"))
             timeout_timer.start()
         
-        # Start output timeout monitor thread if needed
+        # Idle / first-output monitoring: a recurring SIGALRM tick instead
+        # of a dedicated thread waking every 100ms just to compare clocks.
+        # ITIMER_REAL is shared with the overall --timeout alarm set in
+        # main(), so while the tick is installed its handler also enforces
+        # that deadline. Falls back to the polling thread if the interval
+        # timer can't be installed (non-main thread, exotic platform).
         output_timeout_thread = None
+        itimer_installed = False
         if args.idle_timeout or args.first_output_timeout:
-            output_timeout_thread = threading.Thread(target=check_output_timeouts, daemon=True)
-            output_timeout_thread.start()
+            monitor_start = time.monotonic()
+            overall_deadline = monitor_start + args.timeout if args.timeout else None
+
+            def _timeout_tick(signum, frame):
+                if ctx.timed_out or process.poll() is not None:
+                    return
+                now = time.monotonic()
+                if overall_deadline is not None and now >= overall_deadline:
+                    raise TimeoutError("Timeout exceeded")
+                if args.first_output_timeout and not ctx.first_output_seen:
+                    if now - monitor_start >= args.first_output_timeout:
+                        timeout_callback(f"no first output after {args.first_output_timeout}s")
+                        return
+                if args.idle_timeout and now - ctx.last_output_time >= args.idle_timeout:
+                    timeout_callback(f"no output for {args.idle_timeout}s")
+
+            try:
+                signal.signal(signal.SIGALRM, _timeout_tick)
+                signal.setitimer(signal.ITIMER_REAL, 0.1, 0.1)
+                itimer_installed = True
+            except (ValueError, AttributeError, OSError):
+                output_timeout_thread = threading.Thread(target=check_output_timeouts, daemon=True)
+                output_timeout_thread.start()
         
         # Start stderr idle monitor thread if needed
         stderr_idle_thread = None
@@ -1353,29 +2198,48 @@ def run_command_mode(args, default_pattern: Pattern, use_color: bool, telemetry_
                 pattern = fd_patterns.get(fd_num, default_pattern)
                 streams_to_monitor.append((stream, fd_num, fd_label, pattern))
         
+        # Per-fd dispatch tables, built once: custom fds (>= 3) fall
+        # through .get() to None, and per-fd log files would slot in here
+        # without touching the monitor factories
+        log_by_fd = {1: stdout_log_file, 2: stderr_log_file}
+        role_by_fd = {1: 'stdout', 2: 'stderr'}
+
+        # Run-invariant process_stream arguments bound once; the monitor
+        # factories pass only the per-stream pieces (process_stream runs
+        # once per stream, so this trims the duplicated argument lists
+        # rather than any per-call cost)
+        _ps = functools.partial(
+            process_stream, args=args, line_number_offset=0, ctx=ctx,
+            use_color=use_color, telemetry_collector=telemetry_collector,
+            execution_id=execution_id, start_time=start_time,
+            success_pattern=success_pattern)
+
         # Create monitoring threads for all streams
         if len(streams_to_monitor) > 1 or fd_streams:
-            # Multiple streams - use threads
+            # Multiple streams: one selector loop does all the kernel reads,
+            # the per-stream threads consume decoded lines from memory
+            demux = _StreamDemux(ctx)
+            streams_to_monitor = [
+                (demux.register(stream), fd_num, label, pattern)
+                for stream, fd_num, label, pattern in streams_to_monitor
+            ]
+            demux.start()
             for stream, fd_num, label, pattern in streams_to_monitor:
                 def make_monitor(s, fn, lbl, pat):
-                    # Determine which log file to use based on fd_num
-                    log_f = stdout_log_file if fn == 1 else stderr_log_file if fn == 2 else None
-                    # Determine which first-time tracker to use
-                    first_time = first_stdout_time if fn == 1 else first_stderr_time if fn == 2 else None
-                    # Determine stderr tracking (only for fd 2)
-                    stderr_time = last_stderr_time if fn == 2 else None
-                    stderr_flag = stderr_seen if fn == 2 else None
+                    log_f = log_by_fd.get(fn)
+                    # Stream role selects the per-stream trackers inside process_stream
+                    role = role_by_fd.get(fn)
                     def monitor():
                         try:
-                            process_stream(s, pat, args, 0, match_count, use_color, lbl,
-                                         last_output_time, first_output_seen, first_time,
-                                         match_timestamp,
-                                         telemetry_collector, execution_id, start_time, source_file_container,
-                                         post_match_lines, log_f, statistics['lines_processed'],
-                                         success_pattern, match_type, stuck_detected,
-                                         stderr_time, stderr_flag)
-                        except:
+                            _ps(s, pat, stream_name=lbl, log_file=log_f,
+                                stream_role=role)
+                        except (OSError, ValueError):
+                            # Closed/broken pipe during shutdown - typed so
+                            # KeyboardInterrupt/SystemExit still propagate
                             pass
+                        finally:
+                            # Stream ended - let the wait loop re-check liveness
+                            ctx.wake.set()
                     return monitor
                 
                 thread = threading.Thread(
@@ -1389,16 +2253,9 @@ def run_command_mode(args, default_pattern: Pattern, use_color: bool, telemetry_
             if args.match_stderr == 'stdout':
                 # Drain stderr
                 def drain_stderr():
-                    try:
-                        for line in process.stderr:
-                            # Write to stderr log if enabled
-                            if stderr_log_file:
-                                stderr_log_file.write(line.decode('utf-8', errors='replace'))
-                                stderr_log_file.flush()
-                            if not args.json:
-                                print(line.decode('utf-8', errors='replace'), end='', file=sys.stderr, flush=True)
-                    except:
-                        pass
+                    _drain_stream(process.stderr,
+                                  None if args.json else sys.stderr,
+                                  stderr_log_file)
                 t = threading.Thread(target=drain_stderr, daemon=True)
                 t.start()
                 threads.append(t)
@@ -1406,16 +2263,9 @@ def run_command_mode(args, default_pattern: Pattern, use_color: bool, telemetry_
             elif args.match_stderr == 'stderr':
                 # Drain stdout
                 def drain_stdout():
-                    try:
-                        for line in process.stdout:
-                            # Write to stdout log if enabled
-                            if stdout_log_file:
-                                stdout_log_file.write(line.decode('utf-8', errors='replace'))
-                                stdout_log_file.flush()
-                            if not args.json:
-                                print(line.decode('utf-8', errors='replace'), end='', flush=True)
-                    except:
-                        pass
+                    _drain_stream(process.stdout,
+                                  None if args.json else sys.stdout,
+                                  stdout_log_file)
                 t = threading.Thread(target=drain_stdout, daemon=True)
                 t.start()
                 threads.append(t)
@@ -1427,143 +2277,38 @@ def run_command_mode(args, default_pattern: Pattern, use_color: bool, telemetry_
                 progress_stop_event = threading.Event()
                 progress_thread = threading.Thread(
                     target=show_progress_indicator,
-                    args=(args, start_time, last_output_time, statistics['lines_processed'],
-                          match_count, progress_stop_event),
+                    args=(args, start_time, ctx, progress_stop_event),
                     daemon=True
                 )
                 progress_thread.start()
             
             # Wait for threads to complete or match to be found
-            while any(t.is_alive() for t in threads):
-                # Check for stuck detection
-                if stuck_detected[0]:
-                    # Stuck detected - cleanup and return
-                    if timeout_timer:
-                        timeout_timer.cancel()
-                    if process.poll() is None:
-                        process.terminate()
-                        try:
-                            process.wait(timeout=1)
-                        except subprocess.TimeoutExpired:
-                            process.kill()
-                    return 2, 'stuck'
-                
-                if match_count[0] >= args.max_count:
-                    # Check if delay-exit period has expired OR if enough lines captured
-                    should_exit = False
-                    if args.delay_exit and args.delay_exit > 0 and match_timestamp[0] > 0:
-                        elapsed = time.time() - match_timestamp[0]
-                        if elapsed >= args.delay_exit:
-                            should_exit = True
-                        elif post_match_lines[0] >= args.delay_exit_after_lines:
-                            should_exit = True
-                    elif args.delay_exit == 0 or match_timestamp[0] == 0:
-                        # No delay or no match timestamp recorded yet, exit immediately
-                        should_exit = True
-                    
-                    if should_exit:
-                        # Cancel timeout timer
-                        if timeout_timer:
-                            timeout_timer.cancel()
-                        
-                        # Check if detach mode is enabled
-                        if args.detach:
-                            # Detach mode: Don't kill subprocess
-                            detached_pid[0] = process.pid
-                            if not args.quiet:
-                                if args.detach_group:
-                                    pgid = get_process_group_id(process.pid)
-                                    print(f"\n🔓 Detached from process group (PGID: {pgid}, PID: {process.pid})", file=sys.stderr)
-                                else:
-                                    print(f"\n🔓 Detached from subprocess (PID: {process.pid})", file=sys.stderr)
-                                print(f"   Subprocess continues running in background", file=sys.stderr)
-                                if args.detach_group:
-                                    pgid = get_process_group_id(process.pid)
-                                    print(f"   Use 'kill -- -{pgid}' to stop process group", file=sys.stderr)
-                                else:
-                                    print(f"   Use 'kill {process.pid}' to stop it later", file=sys.stderr)
-                            # Write PID file if requested
-                            if args.pid_file:
-                                write_pid_file(process.pid, args.pid_file, args.quiet)
-                            # Don't terminate or kill - just break out of loop
-                            break
-                        else:
-                            # Normal mode: Kill subprocess
-                            if args.detach_group:
-                                # Kill process group
-                                pgid = get_process_group_id(process.pid)
-                                if pgid:
-                                    kill_process_group(pgid)
-                                else:
-                                    # Fallback to single process
-                                    try:
-                                        process.terminate()
-                                    except (PermissionError, OSError):
-                                        pass
-                                    try:
-                                        process.wait(timeout=1)
-                                    except subprocess.TimeoutExpired:
-                                        try:
-                                            process.kill()
-                                        except (PermissionError, OSError):
-                                            pass
-                            else:
-                                try:
-                                    process.terminate()
-                                except (PermissionError, OSError):
-                                    pass
-                                try:
-                                    process.wait(timeout=1)
-                                except subprocess.TimeoutExpired:
-                                    try:
-                                        process.kill()
-                                    except (PermissionError, OSError):
-                                        pass
-                            break
-                if timed_out[0]:
-                    break
-                # Wait a bit (check frequently for delay expiration)
-                time.sleep(0.1)
-            
+            if _wait_for_monitors(threads, args, ctx, process, timeout_timer,
+                                  check_stuck=True) == 'stuck':
+                _shutdown_process(process, timeout_timer)
+                return 2, 'stuck'
+
             # After threads complete, check one more time if we found a match and should detach
-            # (Threads might have completed before we entered the while loop above)
-            if match_count[0] >= args.max_count and args.detach and not detached_pid[0]:
-                # Pattern matched and detach mode is enabled
-                detached_pid[0] = process.pid
-                if not args.quiet:
-                    if args.detach_group:
-                        pgid = get_process_group_id(process.pid)
-                        print(f"\n🔓 Detached from process group (PGID: {pgid}, PID: {process.pid})", file=sys.stderr)
-                    else:
-                        print(f"\n🔓 Detached from subprocess (PID: {process.pid})", file=sys.stderr)
-                    print(f"   Subprocess continues running in background", file=sys.stderr)
-                    if args.detach_group:
-                        pgid = get_process_group_id(process.pid)
-                        print(f"   Use 'kill -- -{pgid}' to stop process group", file=sys.stderr)
-                    else:
-                        print(f"   Use 'kill {process.pid}' to stop it later", file=sys.stderr)
-                # Write PID file if requested
-                if args.pid_file:
-                    write_pid_file(process.pid, args.pid_file, args.quiet)
-        
+            # (Threads might have completed before we entered the wait loop above)
+            if ctx.match_count >= args.max_count and args.detach and not ctx.detached_pid:
+                _announce_detach(args, ctx, process)
+
         elif streams_to_monitor:
             # Single stream - use thread to allow delay monitoring
             stream, fd_num, label, pattern = streams_to_monitor[0]
-            # Determine which log file to use based on fd_num
-            log_file_for_stream = stdout_log_file if fd_num == 1 else stderr_log_file if fd_num == 2 else None
-            # Determine which first-time tracker to use
-            first_time_for_stream = first_stdout_time if fd_num == 1 else first_stderr_time if fd_num == 2 else None
-            
+            log_file_for_stream = log_by_fd.get(fd_num)
+            stream_role = role_by_fd.get(fd_num)
+
             def monitor_single():
                 try:
-                    process_stream(stream, pattern, args, 0, match_count, use_color, label,
-                                 last_output_time, first_output_seen, first_time_for_stream,
-                                 match_timestamp,
-                                 telemetry_collector, execution_id, start_time, source_file_container,
-                                 post_match_lines, log_file_for_stream, statistics['lines_processed'],
-                                 success_pattern, match_type)
-                except:
+                    _ps(stream, pattern, stream_name=label,
+                        log_file=log_file_for_stream, stream_role=stream_role)
+                except (OSError, ValueError):
+                    # Closed/broken pipe during shutdown
                     pass
+                finally:
+                    # Stream ended - let the wait loop re-check liveness
+                    ctx.wake.set()
             
             monitor_thread = threading.Thread(target=monitor_single, daemon=True)
             monitor_thread.start()
@@ -1575,263 +2320,62 @@ def run_command_mode(args, default_pattern: Pattern, use_color: bool, telemetry_
                 progress_stop_event = threading.Event()
                 progress_thread = threading.Thread(
                     target=show_progress_indicator,
-                    args=(args, start_time, last_output_time, statistics['lines_processed'],
-                          match_count, progress_stop_event),
+                    args=(args, start_time, ctx, progress_stop_event),
                     daemon=True
                 )
                 progress_thread.start()
             
-            # Monitor for match and delay expiration
-            while monitor_thread.is_alive():
-                if match_count[0] >= args.max_count:
-                    # Check if delay-exit period has expired OR if enough lines captured
-                    should_exit = False
-                    if args.delay_exit and args.delay_exit > 0 and match_timestamp[0] > 0:
-                        elapsed = time.time() - match_timestamp[0]
-                        if elapsed >= args.delay_exit:
-                            should_exit = True
-                        elif post_match_lines[0] >= args.delay_exit_after_lines:
-                            should_exit = True
-                    elif args.delay_exit == 0 or match_timestamp[0] == 0:
-                        # No delay or no match timestamp recorded yet, exit immediately
-                        should_exit = True
-                    
-                    if should_exit:
-                        # Cancel timeout timer
-                        if timeout_timer:
-                            timeout_timer.cancel()
-                        
-                        # Check if detach mode is enabled
-                        if args.detach:
-                            # Detach mode: Don't kill subprocess
-                            detached_pid[0] = process.pid
-                            if not args.quiet:
-                                if args.detach_group:
-                                    pgid = get_process_group_id(process.pid)
-                                    print(f"\n🔓 Detached from process group (PGID: {pgid}, PID: {process.pid})", file=sys.stderr)
-                                else:
-                                    print(f"\n🔓 Detached from subprocess (PID: {process.pid})", file=sys.stderr)
-                                print(f"   Subprocess continues running in background", file=sys.stderr)
-                                if args.detach_group:
-                                    pgid = get_process_group_id(process.pid)
-                                    print(f"   Use 'kill -- -{pgid}' to stop process group", file=sys.stderr)
-                                else:
-                                    print(f"   Use 'kill {process.pid}' to stop it later", file=sys.stderr)
-                            # Write PID file if requested
-                            if args.pid_file:
-                                write_pid_file(process.pid, args.pid_file, args.quiet)
-                            # Don't terminate or kill - just break out of loop
-                            break
-                        else:
-                            # Normal mode: Kill subprocess
-                            if args.detach_group:
-                                # Kill process group
-                                pgid = get_process_group_id(process.pid)
-                                if pgid:
-                                    kill_process_group(pgid)
-                                else:
-                                    # Fallback to single process
-                                    try:
-                                        process.terminate()
-                                    except (PermissionError, OSError):
-                                        pass
-                                    try:
-                                        process.wait(timeout=1)
-                                    except subprocess.TimeoutExpired:
-                                        try:
-                                            process.kill()
-                                        except (PermissionError, OSError):
-                                            pass
-                            else:
-                                try:
-                                    process.terminate()
-                                except (PermissionError, OSError):
-                                    pass
-                                try:
-                                    process.wait(timeout=1)
-                                except subprocess.TimeoutExpired:
-                                    try:
-                                        process.kill()
-                                    except (PermissionError, OSError):
-                                        pass
-                            break
-                if timed_out[0]:
-                    break
-                # Wait a bit (check frequently for delay expiration)
-                time.sleep(0.1)
-            
+            # Monitor for match and delay expiration (stuck detection
+            # keeps its historical single-stream handling: the monitor
+            # thread exits and the normal completion path runs)
+            _wait_for_monitors([monitor_thread], args, ctx, process,
+                               timeout_timer)
+
             # After thread completes, check one more time if we found a match and should detach
-            # (Thread might have completed before we entered the while loop above)
-            if match_count[0] >= args.max_count and args.detach and not detached_pid[0]:
-                # Pattern matched and detach mode is enabled
-                detached_pid[0] = process.pid
-                if not args.quiet:
-                    if args.detach_group:
-                        pgid = get_process_group_id(process.pid)
-                        print(f"\n🔓 Detached from process group (PGID: {pgid}, PID: {process.pid})", file=sys.stderr)
-                    else:
-                        print(f"\n🔓 Detached from subprocess (PID: {process.pid})", file=sys.stderr)
-                    print(f"   Subprocess continues running in background", file=sys.stderr)
-                    if args.detach_group:
-                        pgid = get_process_group_id(process.pid)
-                        print(f"   Use 'kill -- -{pgid}' to stop process group", file=sys.stderr)
-                    else:
-                        print(f"   Use 'kill {process.pid}' to stop it later", file=sys.stderr)
-                # Write PID file if requested
-                if args.pid_file:
-                    write_pid_file(process.pid, args.pid_file, args.quiet)
-            
+            # (Thread might have completed before we entered the wait loop above)
+            if ctx.match_count >= args.max_count and args.detach and not ctx.detached_pid:
+                _announce_detach(args, ctx, process)
+
             # If no match found, drain the other stream
-            if match_count[0] < args.max_count:
+            if ctx.match_count < args.max_count:
                 if args.match_stderr == 'stdout' and not args.json:
-                    try:
-                        for line in process.stderr:
-                            print(line.decode('utf-8', errors='replace'), end='', file=sys.stderr, flush=True)
-                    except:
-                        pass
+                    _drain_stream(process.stderr, sys.stderr)
                 elif args.match_stderr == 'stderr' and not args.json:
-                    try:
-                        for line in process.stdout:
-                            print(line.decode('utf-8', errors='replace'), end='', flush=True)
-                    except:
-                        pass
-        
-        # Old code below - DISABLED (replaced by threaded monitoring above)
-        if False:
-            # This entire block is disabled - all monitoring now uses the threaded approach above
-            # Kept for reference only, will be removed in future cleanup
-            if args.match_stderr == 'both':
-                # Monitor both streams in parallel
-                stdout_lines = [0]
-                stderr_lines = [0]
-                
-                def monitor_stdout():
-                    try:
-                        stdout_lines[0] = process_stream(
-                            process.stdout, pattern, args, 0, match_count, use_color, "stdout",
-                            None, None, first_stdout_time,
-                            None, telemetry_collector, execution_id, start_time, source_file_container,
-                            post_match_lines, stdout_log_file, statistics['lines_processed'],
-                            success_pattern, match_type
-                        )
-                    except:
-                        pass
-                
-                def monitor_stderr():
-                    try:
-                        stderr_lines[0] = process_stream(
-                            process.stderr, pattern, args, 0, match_count, use_color, "stderr",
-                            None, None, first_stderr_time,
-                            None, telemetry_collector, execution_id, start_time, source_file_container,
-                            post_match_lines, stderr_log_file, statistics['lines_processed'],
-                            success_pattern, match_type
-                        )
-                    except:
-                        pass
-                
-                stdout_thread = threading.Thread(target=monitor_stdout, daemon=True)
-                stderr_thread = threading.Thread(target=monitor_stderr, daemon=True)
-                
-                stdout_thread.start()
-                stderr_thread.start()
-                
-                # Wait for threads to complete or match to be found
-                while stdout_thread.is_alive() or stderr_thread.is_alive():
-                    if match_count[0] >= args.max_count:
-                        # Kill the process on match
-                        if timeout_timer:
-                            timeout_timer.cancel()
-                        process.terminate()
-                        try:
-                            process.wait(timeout=1)
-                        except subprocess.TimeoutExpired:
-                            process.kill()
-                        break
-                    if timed_out[0]:
-                        break
-                    stdout_thread.join(timeout=0.1)
-                    if stderr_thread.is_alive():
-                        stderr_thread.join(timeout=0.1)
-                
-            elif args.match_stderr == 'stderr':
-                # Only monitor stderr
-                try:
-                    process_stream(process.stderr, pattern, args, 0, match_count, use_color, "stderr",
-                                 None, None, first_stderr_time,
-                                 None, telemetry_collector, execution_id, start_time, source_file_container,
-                                 post_match_lines, stderr_log_file, statistics['lines_processed'],
-                                 success_pattern, match_type, stuck_detected,
-                                 last_stderr_time, stderr_seen)
-                except:
-                    pass
-                # Drain stdout
-                try:
-                    for line in process.stdout:
-                        # Write to stdout log if enabled
-                        if stdout_log_file:
-                            stdout_log_file.write(line.decode('utf-8', errors='replace'))
-                            stdout_log_file.flush()
-                        if not args.json:
-                            print(line.decode('utf-8', errors='replace'), end='', flush=True)
-                except:
-                    pass
-            else:
-                # Only monitor stdout (default)
-                try:
-                    process_stream(process.stdout, pattern, args, 0, match_count, use_color, "stdout",
-                                 None, None, first_stdout_time,
-                                 None, telemetry_collector, execution_id, start_time, source_file_container,
-                                 post_match_lines, stdout_log_file, statistics['lines_processed'],
-                                 success_pattern, match_type, stuck_detected,
-                                 None, None)
-                except:
-                    pass
-                # Drain stderr (only if we didn't detach)
-                if not (args.detach and detached_pid[0]):
-                    try:
-                        for line in process.stderr:
-                            # Write to stderr log if enabled
-                            if stderr_log_file:
-                                stderr_log_file.write(line.decode('utf-8', errors='replace'))
-                                stderr_log_file.flush()
-                            if not args.json:
-                                print(line.decode('utf-8', errors='replace'), end='', file=sys.stderr, flush=True)
-                    except:
-                        pass
+                    _drain_stream(process.stdout, sys.stdout)
         
         # Cancel timeout if still running
         if timeout_timer:
             timeout_timer.cancel()
         
         # If we detached, don't wait for process - return immediately
-        if args.detach and detached_pid[0]:
+        if args.detach and ctx.detached_pid:
             # Close our end of the pipes so subprocess can continue independently
             try:
                 process.stdout.close()
-            except:
+            except OSError:
                 pass
             try:
                 process.stderr.close()
-            except:
+            except OSError:
                 pass
             return 4  # Detached (subprocess still running)
         
         # Wait for process to complete (only if we didn't detach)
-        try:
-            return_code = process.wait(timeout=1)
-        except subprocess.TimeoutExpired:
+        if _wait_fast(process):
+            return_code = process.returncode
+        else:
             process.kill()
             return_code = process.wait()
         
         # Check if we timed out
-        if timed_out[0]:
+        if ctx.timed_out:
             # Check if we detached on timeout
-            if args.detach and args.detach_on_timeout and detached_pid[0]:
+            if args.detach and args.detach_on_timeout and ctx.detached_pid:
                 return 4  # Detached on timeout (subprocess still running)
             else:
                 if not args.quiet:
-                    if timeout_reason[0]:
-                        print(f"\n⏱️  Timeout: {timeout_reason[0]}", file=sys.stderr)
+                    if ctx.timeout_reason:
+                        print(f"\n⏱️  Timeout: {ctx.timeout_reason}", file=sys.stderr)
                     else:
                         print(f"\n⏱️  Timeout exceeded", file=sys.stderr)
                 return 2
@@ -1843,11 +2387,11 @@ def run_command_mode(args, default_pattern: Pattern, use_color: bool, telemetry_
         
         if using_dual_patterns:
             # Dual-pattern mode: success/error patterns specified
-            if match_type[0] == 'success':
+            if ctx.match_type == 'success':
                 return 0  # Success pattern matched
-            elif match_type[0] == 'error':
+            elif ctx.match_type == 'error':
                 return 1  # Error pattern matched
-            elif match_type[0] == 'none':
+            elif ctx.match_type == 'none':
                 # No match in dual-pattern mode
                 if success_pattern and not error_pattern:
                     # Success-pattern only: no success found = failure
@@ -1860,9 +2404,9 @@ def run_command_mode(args, default_pattern: Pattern, use_color: bool, telemetry_
                     return 1
         else:
             # Traditional grep mode: use grep exit code convention
-            if match_count[0] >= args.max_count:
+            if ctx.match_count >= args.max_count:
                 return 0  # Pattern matched - max count reached
-            elif match_count[0] > 0:
+            elif ctx.match_count > 0:
                 return 0  # At least one match found
             else:
                 return 1  # No match found
@@ -1899,10 +2443,19 @@ def run_command_mode(args, default_pattern: Pattern, use_color: bool, telemetry_
             return 2
     except Exception as e:
         print(f"❌ Error running command: {e}", file=sys.stderr)
-        import traceback
-        traceback.print_exc()
+        if args.verbose:
+            traceback.print_exc()
         return 3
     finally:
+        # Cancel the idle/first-output tick and restore the plain timeout
+        # handler (main() still owns the --timeout alarm semantics)
+        if 'itimer_installed' in locals() and itimer_installed:
+            try:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, timeout_handler)
+            except (ValueError, OSError):
+                pass
+
         # Stop progress indicator if it was started
         if 'progress_stop_event' in locals() and progress_stop_event:
             progress_stop_event.set()
@@ -1913,12 +2466,12 @@ def run_command_mode(args, default_pattern: Pattern, use_color: bool, telemetry_
         if stdout_log_file:
             try:
                 stdout_log_file.close()
-            except:
+            except OSError:
                 pass
         if stderr_log_file:
             try:
                 stderr_log_file.close()
-            except:
+            except OSError:
                 pass
         
         # Gzip log files if requested
@@ -1933,7 +2486,7 @@ def run_command_mode(args, default_pattern: Pattern, use_color: bool, telemetry_
         for fd in pipes_to_close:
             try:
                 os.close(fd)
-            except:
+            except OSError:
                 pass
 
 
@@ -1952,8 +2505,6 @@ def test_pattern_mode(args, pattern: Pattern, success_pattern: Optional[Pattern]
     Returns:
         Exit code: 0 if matches found, 1 if no matches
     """
-    import sys
-    
     # Statistics
     total_lines = 0
     matched_lines = []  # List of (line_num, line_text, match_type)
@@ -1961,27 +2512,49 @@ def test_pattern_mode(args, pattern: Pattern, success_pattern: Optional[Pattern]
     success_matches = 0
     error_matches = 0
     
+    def _input_lines():
+        """Yield stripped input lines, memory-mapping regular files.
+
+        When stdin is redirected from a file there is no streaming to do:
+        mmap it, decode once, and split in bulk instead of paying a
+        readline + decode per line. Pipes and TTYs keep line iteration.
+        """
+        try:
+            fd = sys.stdin.fileno()
+            is_regular = stat.S_ISREG(os.fstat(fd).st_mode)
+        except (OSError, ValueError, AttributeError):
+            is_regular = False
+        if is_regular:
+            try:
+                with mmap.mmap(fd, 0, prot=mmap.PROT_READ) as mm:
+                    if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                        try:
+                            mm.madvise(mmap.MADV_SEQUENTIAL)
+                        except (OSError, ValueError):
+                            pass
+                    lines = mm[:].decode('utf-8', errors='replace').split('\n')
+                if lines and lines[-1] == '':
+                    lines.pop()  # No phantom line after a trailing newline
+                for line in lines:
+                    yield line.rstrip('\r')
+                return
+            except (OSError, ValueError):
+                pass  # Empty file or unmappable - fall through to iteration
+        for line in sys.stdin:
+            yield line.rstrip('\n\r')
+
+    # Exclusions compiled once for the stream
+    exclude_search = _compile_exclusions(getattr(args, 'exclude_patterns', None),
+                                         re.IGNORECASE if args.ignore_case else 0)
+
     # Read from stdin
     try:
-        for line_num, line in enumerate(sys.stdin, 1):
+        for line_num, line_stripped in enumerate(_input_lines(), 1):
             total_lines += 1
-            line_stripped = line.rstrip('\n\r')
-            
-            # Check exclusion patterns first
-            excluded = False
-            if hasattr(args, 'exclude_patterns') and args.exclude_patterns:
-                for exclude_pattern_str in args.exclude_patterns:
-                    try:
-                        flags = re.IGNORECASE if args.ignore_case else 0
-                        exclude_pattern = re.compile(exclude_pattern_str, flags)
-                        if exclude_pattern.search(line_stripped):
-                            excluded = True
-                            excluded_lines += 1
-                            break
-                    except re.error:
-                        pass
-            
-            if excluded:
+
+            # Check exclusion patterns first - precompiled above
+            if exclude_search is not None and exclude_search(line_stripped):
+                excluded_lines += 1
                 continue
             
             # Check patterns
@@ -2076,17 +2649,13 @@ def test_pattern_mode(args, pattern: Pattern, success_pattern: Optional[Pattern]
         return 1  # No match
 
 
-def main():
-    """Main entry point"""
-    # Support EARLYEXIT_OPTIONS environment variable (like GREP_OPTIONS)
-    # Insert env options at the beginning so CLI args can override them
-    env_options = os.getenv('EARLYEXIT_OPTIONS', '').strip()
-    if env_options:
-        import shlex
-        env_args = shlex.split(env_options)
-        # Insert after program name but before user args
-        sys.argv[1:1] = env_args
-    
+@functools.lru_cache(maxsize=1)
+def _build_parser() -> argparse.ArgumentParser:
+    """
+    Build the argument parser (cached - construction runs ~66
+    add_argument calls, so repeated main() invocations in one process
+    reuse the instance; parse_known_args itself is reentrant)
+    """
     parser = argparse.ArgumentParser(
         description='''Early exit pattern matching - exit immediately when pattern matches
 
@@ -2362,14 +2931,25 @@ Exit codes (Unix convention, --unix-exit-codes):
     parser.add_argument('--verbose', action='store_true',
                        help='Verbose output (show debug information)')
     parser.add_argument('--version', action='version', version='%(prog)s 0.0.4')
+    return parser
+
+
+def main():
+    """Main entry point"""
+    # Support EARLYEXIT_OPTIONS environment variable (like GREP_OPTIONS)
+    # Insert env options at the beginning so CLI args can override them
+    env_options = os.getenv('EARLYEXIT_OPTIONS', '').strip()
+    if env_options:
+        import shlex
+        env_args = shlex.split(env_options)
+        # Insert after program name but before user args
+        sys.argv[1:1] = env_args
+    
+    parser = _build_parser()
     
     # Pre-process sys.argv to handle optional pattern with '--' separator
     # If '--' separator is present but no pattern before it, insert 'NONE'
-    import sys as sys_module
-    argv = sys_module.argv[1:]  # Skip program name
-    
-    # Check if any timeout option is present
-    has_timeout_option = any(opt in argv for opt in ['-t', '--timeout', '-I', '--idle-timeout', '-F', '--first-output-timeout'])
+    argv = sys.argv[1:]  # Skip program name
     
     # Check if '--' is present and is the first positional argument (no pattern before it)
     # Positional args come after all options
@@ -2387,17 +2967,9 @@ Exit codes (Unix convention, --unix-exit-codes):
                 skip_next = False
                 continue
             if arg.startswith('-'):
-                # It's an option
-                # Check if this option takes a value (not a flag)
-                if arg in ['-t', '--timeout', '-I', '--idle-timeout', '-F', '--first-output-timeout', 
-                          '-m', '--max-count', '--delay-exit', '--fd', '--source-file', '--pid-file',
-                          '--file-prefix', '--log-dir', '--profile', '--fd-pattern', '-A', '-B', '-C',
-                          '--delay-exit-after-lines', '-s', '--success-pattern', '-e', '--error-pattern',
-                          '-X', '--exclude'] or \
-                   (arg.startswith('-') and '=' in arg):
-                    # This option takes a value
-                    if '=' not in arg:
-                        skip_next = True  # Next arg is the value
+                # It's an option - if it takes a value, skip the value too
+                if arg in _VALUE_OPTS:
+                    skip_next = True  # Next arg is the value
                 continue
             else:
                 # Non-option argument before '--' - this is the pattern
@@ -2449,14 +3021,9 @@ Exit codes (Unix convention, --unix-exit-codes):
     # If pattern is a simple lowercase word (no regex chars, not all caps like ERROR)
     # AND there are command arguments, treat pattern as part of command
     if args.pattern and args.command:
-        import re as re_module
-        # Check if pattern looks like a command (lowercase word, no special regex chars)
-        is_simple_word = re_module.match(r'^[a-z][a-z0-9_-]*$', args.pattern)
-        # Common command names that should never be treated as patterns
-        known_commands = ['mist', 'databricks', 'kubectl', 'terraform', 'docker', 'aws', 'gcloud', 'az', 
-                         'python', 'python3', 'node', 'bash', 'sh', 'npm', 'yarn', 'cargo', 'go', 'java']
-        
-        if is_simple_word or args.pattern in known_commands:
+        # Set membership short-circuits before the regex runs; both are
+        # prebuilt at module scope
+        if args.pattern in _KNOWN_COMMANDS or _SIMPLE_WORD_RE.match(args.pattern):
             # Pattern looks like a command - move it to the command list
             args.command.insert(0, args.pattern)
             args.pattern = None
@@ -2631,14 +3198,17 @@ Exit codes (Unix convention, --unix-exit-codes):
         # Enter watch mode
         try:
             from earlyexit.watch_mode import run_watch_mode
-            
+
+            # Joined once; reused for project detection and telemetry below
+            full_command_str = ' '.join(full_command)
+
             # Detect project type (telemetry not initialized yet, so do it manually)
             project_type = 'unknown'
             try:
-                if TELEMETRY_AVAILABLE:
-                    from earlyexit.telemetry import TelemetryCollector
-                    temp_collector = TelemetryCollector()
-                    project_type = temp_collector._detect_project_type(' '.join(full_command))
+                _tel = _load_telemetry()
+                if _tel is not None:
+                    temp_collector = _tel.TelemetryCollector()
+                    project_type = temp_collector._detect_project_type(full_command_str)
             except:
                 pass
             
@@ -2646,23 +3216,21 @@ Exit codes (Unix convention, --unix-exit-codes):
             
             # Generate execution ID for telemetry
             execution_id = None
-            env_no_telemetry = os.environ.get('EARLYEXIT_NO_TELEMETRY', '').lower() in ('1', 'true', 'yes')
-            telemetry_enabled = TELEMETRY_AVAILABLE and not args.no_telemetry and not env_no_telemetry
+            telemetry_enabled = (not args.no_telemetry and not _NO_TELEMETRY_ENV
+                                 and _load_telemetry() is not None)
             
             if telemetry_enabled:
-                try:
-                    execution_id = f"exec_{int(telemetry_start_time * 1000)}_{os.getpid()}"
-                except:
-                    pass
+                execution_id = "exec_%d_%d" % (int(telemetry_start_time * 1000), _PID)
             
-            # Check for smart suggestions (if telemetry enabled)
+            # Check for smart suggestions (if telemetry enabled).
+            # Suggestions are interactive prompts, so --quiet skips the
+            # whole lookup path, not just the output
             suggested_setting_id = None
-            if telemetry_enabled:
+            if telemetry_enabled and not args.quiet:
                 try:
-                    from earlyexit.telemetry import get_telemetry
                     from earlyexit.suggestions import check_and_offer_suggestion
-                    
-                    telemetry_collector = get_telemetry()
+
+                    telemetry_collector = _load_telemetry().get_telemetry()
                     if telemetry_collector:
                         suggested_setting_id = check_and_offer_suggestion(
                             args, full_command, telemetry_collector
@@ -2676,11 +3244,10 @@ Exit codes (Unix convention, --unix-exit-codes):
             # Record to telemetry if enabled
             if telemetry_enabled:
                 try:
-                    from earlyexit.telemetry import get_telemetry
-                    telemetry_collector = get_telemetry()
+                    telemetry_collector = _load_telemetry().get_telemetry()
                     if telemetry_collector and telemetry_collector.enabled:
                         telemetry_data = {
-                            'command': ' '.join(full_command),
+                            'command': full_command_str,
                             'pattern': '<watch mode>',
                             'exit_code': exit_code,
                             'exit_reason': 'watch_mode_interrupt' if exit_code == 130 else 'watch_mode_complete',
@@ -2691,7 +3258,7 @@ Exit codes (Unix convention, --unix-exit-codes):
                         # Record execution with the same execution_id used in watch mode
                         if execution_id:
                             telemetry_data['execution_id'] = execution_id
-                        telemetry_collector.record_execution(telemetry_data)
+                        _enqueue_telemetry(telemetry_collector, telemetry_data)
                 except:
                     pass
             
@@ -2700,37 +3267,23 @@ Exit codes (Unix convention, --unix-exit-codes):
             return exit_code
         except Exception as e:
             print(f"❌ Error in watch mode: {e}", file=sys.stderr)
-            import traceback
-            traceback.print_exc()
+            if args.verbose:
+                traceback.print_exc()
             exit_code = 1
             exit_code = map_exit_code(exit_code, args.unix_exit_codes)
             return exit_code
     
     # Initialize telemetry (opt-out, enabled by default)
     # Can be disabled via --no-telemetry flag or EARLYEXIT_NO_TELEMETRY env var
-    env_no_telemetry = os.environ.get('EARLYEXIT_NO_TELEMETRY', '').lower() in ('1', 'true', 'yes')
-    telemetry_enabled = TELEMETRY_AVAILABLE and not args.no_telemetry and not env_no_telemetry
+    # Flag checks first so a disabled run never triggers the module load
+    telemetry_enabled = (not args.no_telemetry and not _NO_TELEMETRY_ENV
+                         and _load_telemetry() is not None)
     telemetry_collector = None
     telemetry_start_time = time.time()
-    telemetry_data = {
-        'command': ' '.join(args.command) if args.command else '<pipe mode>',
-        'pattern': original_pattern if no_pattern_mode else args.pattern,
-        'pattern_type': 'perl_regex' if args.perl_regexp else 'python_re',
-        'case_insensitive': args.ignore_case,
-        'invert_match': args.invert_match,
-        'max_count': args.max_count,
-        'overall_timeout': args.timeout,
-        'idle_timeout': args.idle_timeout,
-        'first_output_timeout': args.first_output_timeout,
-        'delay_exit': args.delay_exit,
-        'match_count': 0,
-        'exit_code': 0,
-        'exit_reason': 'unknown'
-    }
-    
+
     if telemetry_enabled:
         try:
-            telemetry_collector = telemetry.init_telemetry(enabled=True)
+            telemetry_collector = _load_telemetry().init_telemetry(enabled=True)
             
             # Check database size and show warning if large
             if telemetry_collector and telemetry_collector.enabled:
@@ -2751,6 +3304,10 @@ Exit codes (Unix convention, --unix-exit-codes):
             telemetry_enabled = False
             telemetry_collector = None
     
+    # Joined once; long command lines shouldn't be re-joined by every
+    # consumer (auto-tune analysis, telemetry payload)
+    command_str = ' '.join(args.command) if args.command else None
+
     # Apply auto-tune if requested
     if args.auto_tune:
         if not telemetry_collector:
@@ -2762,44 +3319,45 @@ Exit codes (Unix convention, --unix-exit-codes):
                 engine = inference.get_inference_engine(telemetry_collector)
                 
                 if engine:
-                    # Get command string for analysis
-                    command_str = ' '.join(args.command) if args.command else None
-                    
                     if not command_str:
                         print("⚠️  Warning: Auto-tune works best with command mode. Using pattern-based tuning.", 
                               file=sys.stderr)
                     
                     # Get recommendations
                     recommendations = engine.auto_tune_parameters(command_str or '', pattern=args.pattern)
-                    
-                    print("🤖 Auto-tuning parameters based on telemetry...", file=sys.stderr)
-                    print(f"   Project Type: {recommendations.get('project_type', 'unknown')}", file=sys.stderr)
-                    print(f"   Confidence: {recommendations.get('overall_confidence', 0)*100:.1f}%", file=sys.stderr)
-                    
+
+                    # Collect the report and emit it as one write: a single
+                    # stderr syscall that can't interleave with subprocess
+                    # output already flowing
+                    msgs = ["🤖 Auto-tuning parameters based on telemetry...",
+                            f"   Project Type: {recommendations.get('project_type', 'unknown')}",
+                            f"   Confidence: {recommendations.get('overall_confidence', 0)*100:.1f}%"]
+
                     # Apply recommendations (only if not explicitly set by user)
                     rec = recommendations.get('recommendations', {})
-                    
+
                     # Pattern recommendation (only if pattern was provided as positional arg without explicit value)
                     if 'pattern' in rec and rec['pattern']['confidence'] > 0.5:
                         suggested_pattern = rec['pattern']['value']
                         if args.pattern != suggested_pattern:
-                            print(f"   Using pattern: {suggested_pattern}", file=sys.stderr)
+                            msgs.append(f"   Using pattern: {suggested_pattern}")
                             args.pattern = suggested_pattern
-                    
+
                     # Timeout recommendations (only if not explicitly set)
                     if args.timeout is None and 'overall_timeout' in rec:
                         args.timeout = rec['overall_timeout']['value']
-                        print(f"   Setting overall timeout: {args.timeout:.0f}s", file=sys.stderr)
-                    
+                        msgs.append(f"   Setting overall timeout: {args.timeout:.0f}s")
+
                     if args.idle_timeout is None and 'idle_timeout' in rec:
                         args.idle_timeout = rec['idle_timeout']['value']
-                        print(f"   Setting idle timeout: {args.idle_timeout:.0f}s", file=sys.stderr)
-                    
+                        msgs.append(f"   Setting idle timeout: {args.idle_timeout:.0f}s")
+
                     if args.delay_exit is None and 'delay_exit' in rec:
                         args.delay_exit = rec['delay_exit']['value']
-                        print(f"   Setting delay exit: {args.delay_exit:.0f}s", file=sys.stderr)
-                    
-                    print("", file=sys.stderr)  # Empty line for readability
+                        msgs.append(f"   Setting delay exit: {args.delay_exit:.0f}s")
+
+                    msgs.append('')  # Empty line for readability
+                    sys.stderr.write('\n'.join(msgs) + '\n')
                     
             except ImportError:
                 print("⚠️  Warning: Inference engine unavailable. Install required dependencies.", 
@@ -2811,29 +3369,47 @@ Exit codes (Unix convention, --unix-exit-codes):
     # Create execution ID for telemetry match events
     execution_id = None
     if telemetry_enabled and telemetry_collector:
-        try:
-            # Pre-generate execution ID for this run
-            execution_id = f"exec_{int(telemetry_start_time * 1000)}_{os.getpid()}"
-        except:
-            pass
+        # Pre-generate execution ID for this run
+        execution_id = "exec_%d_%d" % (int(telemetry_start_time * 1000), _PID)
     
     # Use explicit source file for telemetry (or will be detected via FD inspection)
     source_file = args.source_file
-    
+
+    # Decide recording eligibility once: a collector that initialized but
+    # disabled itself (e.g. unwritable database) shouldn't cost each exit
+    # path an attribute chain to find out
+    _record_ok = bool(telemetry_enabled and telemetry_collector
+                      and getattr(telemetry_collector, 'enabled', True))
+
     def record_telemetry(exit_code: int, exit_reason: str, match_count: int = 0):
-        """Helper to record telemetry data"""
-        if not telemetry_enabled or not telemetry_collector:
+        """Helper to record telemetry data
+
+        Builds the payload lazily: disabled runs never allocate the dict,
+        and enabled ones build it once, at the single exit point that
+        records.
+        """
+        if not _record_ok:
             return
-        try:
-            telemetry_data['exit_code'] = exit_code
-            telemetry_data['exit_reason'] = exit_reason
-            telemetry_data['match_count'] = match_count
-            telemetry_data['total_runtime'] = time.time() - telemetry_start_time
-            telemetry_data['timestamp'] = telemetry_start_time
-            telemetry_collector.record_execution(telemetry_data)
-        except Exception:
-            # Silently fail - don't disrupt main execution
-            pass
+        # No try/except: building the dict and enqueueing it cannot raise;
+        # the actual database write runs on the writer thread, which
+        # already swallows errors
+        _enqueue_telemetry(telemetry_collector, {
+                'command': command_str or '<pipe mode>',
+                'pattern': original_pattern if no_pattern_mode else args.pattern,
+                'pattern_type': 'perl_regex' if args.perl_regexp else 'python_re',
+                'case_insensitive': args.ignore_case,
+                'invert_match': args.invert_match,
+                'max_count': args.max_count,
+                'overall_timeout': args.timeout,
+                'idle_timeout': args.idle_timeout,
+                'first_output_timeout': args.first_output_timeout,
+                'delay_exit': args.delay_exit,
+                'match_count': match_count,
+                'exit_code': exit_code,
+                'exit_reason': exit_reason,
+                'total_runtime': time.time() - telemetry_start_time,
+                'timestamp': telemetry_start_time,
+            })
     
     # Convert fd_patterns from list of [fd, pattern] to list of (int(fd), pattern)
     if args.fd_patterns:
@@ -2879,7 +3455,7 @@ Exit codes (Unix convention, --unix-exit-codes):
             elif success_pattern:
                 pattern = success_pattern
             else:
-                pattern = re.compile('(?!.*)')  # Never matches
+                pattern = _NEVER_MATCH
         except re.error as e:
             print(f"❌ Invalid regex pattern: {e}", file=sys.stderr)
             record_telemetry(3, 'invalid_pattern')
@@ -2890,7 +3466,10 @@ Exit codes (Unix convention, --unix-exit-codes):
             return 3
     elif args.pattern == '__DUAL_PATTERN_MODE__':
         # Dummy pattern set to avoid watch mode - use never-match pattern
-        pattern = re.compile('(?!.*)')  # Never matches
+        pattern = _NEVER_MATCH
+    elif no_pattern_mode:
+        # The sentinel is a fixed literal; skip compile_pattern entirely
+        pattern = _NEVER_MATCH
     else:
         # Traditional mode: single pattern
         try:
@@ -2905,9 +3484,13 @@ Exit codes (Unix convention, --unix-exit-codes):
             record_telemetry(3, 'pattern_error')
             return 3
     
-    # Determine if we should colorize
-    use_color = (args.color == 'always' or 
-                 (args.color == 'auto' and sys.stdout.isatty()))
+    # Determine if we should colorize. --json suppresses line passthrough
+    # entirely, so the ANSI wrapping would be dead work there; --quiet
+    # deliberately keeps color (it only silences ee's own messages, not
+    # command output)
+    use_color = (not args.json and
+                 (args.color == 'always' or
+                  (args.color == 'auto' and sys.stdout.isatty())))
     
     # Check if test pattern mode is requested
     if args.test_pattern:
@@ -2948,15 +3531,21 @@ Exit codes (Unix convention, --unix-exit-codes):
         print("❌ Error: --pid-file requires --detach", file=sys.stderr)
         return 3
     
+    # stdin's tty-ness can't change mid-run; one fstat covers the
+    # command-mode warning check and the timeout pipeline hint
+    try:
+        stdin_is_tty = sys.stdin.isatty()
+    except (OSError, ValueError):
+        stdin_is_tty = False  # Treat unknowable stdin as a pipe
+
     # Only allow pipe mode if no command is specified
     if is_command_mode:
         # Warn if trying to pipe data while using command mode
         # Only warn if quiet is not set AND there's actual data being piped
         if not args.quiet:
             try:
-                import select
                 # More robust check: stdin is a pipe AND has data AND not from a TTY
-                if not sys.stdin.isatty():
+                if not stdin_is_tty:
                     readable, _, _ = select.select([sys.stdin], [], [], 0.0)
                     if readable:
                         # Verify it's actually a pipe with data, not just a closed/redirected stdin
@@ -2965,9 +3554,8 @@ Exit codes (Unix convention, --unix-exit-codes):
             except:
                 pass  # Ignore if select not available
     
-    # Set up timeout if requested
+    # Arm the overall timeout if requested (handler installed at import)
     if args.timeout:
-        signal.signal(signal.SIGALRM, timeout_handler)
         signal.alarm(int(args.timeout))
     
     try:
@@ -3037,41 +3625,33 @@ Exit codes (Unix convention, --unix-exit-codes):
             if args.delay_exit is None:
                 args.delay_exit = 0  # No delay by default in pipe mode (backward compatible)
             
-            match_count = [0]  # Use list for consistency with command mode
-            post_match_lines = [0]  # Track lines captured after match
-            match_timestamp = [0]  # Track match time for delay
-            source_file_container = [source_file]  # Mutable container for dynamic detection
-            
-            # Set up timeout monitoring for pipe mode
-            timed_out = [False]
-            first_output_seen = [False]
-            last_output_time = [time.time()]  # Initialize to start time
+            # Shared monitoring state for pipe mode, mutated in place
+            ctx = StreamCtx(source_file=source_file, last_output_time=time.monotonic())
             stop_reading = [False]  # Signal to stop reading
-            stuck_detected = [False]  # Track stuck detection for pipe mode
-            
+
             def timeout_callback(reason):
                 """Handle timeout in pipe mode"""
-                timed_out[0] = True
+                ctx.timed_out = True
                 stop_reading[0] = True
                 if not args.quiet:
                     print(f"\n⏱️  Timeout: {reason}", file=sys.stderr, flush=True)
             
             def check_output_timeouts():
                 """Monitor thread to check for idle and first-output timeouts in pipe mode"""
-                start_time = time.time()
-                
-                while not timed_out[0] and not stop_reading[0]:
-                    current_time = time.time()
-                    
+                start_time = time.monotonic()
+
+                while not ctx.timed_out and not stop_reading[0]:
+                    current_time = time.monotonic()
+
                     # Check first output timeout
-                    if args.first_output_timeout and not first_output_seen[0]:
+                    if args.first_output_timeout and not ctx.first_output_seen:
                         if current_time - start_time >= args.first_output_timeout:
                             timeout_callback(f"no first output after {args.first_output_timeout}s")
                             break
                     
                     # Check idle timeout
-                    if args.idle_timeout and first_output_seen[0]:
-                        time_since_output = current_time - last_output_time[0]
+                    if args.idle_timeout and ctx.first_output_seen:
+                        time_since_output = current_time - ctx.last_output_time
                         if time_since_output >= args.idle_timeout:
                             timeout_callback(f"no output for {args.idle_timeout}s")
                             break
@@ -3085,14 +3665,9 @@ Exit codes (Unix convention, --unix-exit-codes):
                 output_timeout_thread = threading.Thread(target=check_output_timeouts, daemon=True)
                 output_timeout_thread.start()
             
-            match_type = ['none']  # For pipe mode
-            lines_processed = process_stream(sys.stdin, pattern, args, 0, match_count, use_color, 
-                                            "stdin", last_output_time, first_output_seen, None,
-                                            match_timestamp,
-                                            telemetry_collector, execution_id, telemetry_start_time, source_file_container,
-                                            post_match_lines, None, None, 
-                                            success_pattern=None, match_type=match_type, stuck_detected=stuck_detected,
-                                            last_stderr_time=None, stderr_seen=None)
+            lines_processed = process_stream(sys.stdin, pattern, args, 0, ctx, use_color,
+                                            "stdin",
+                                            telemetry_collector, execution_id, telemetry_start_time)
             
             # Stop monitoring thread
             stop_reading[0] = True
@@ -3113,14 +3688,14 @@ Exit codes (Unix convention, --unix-exit-codes):
                 return exit_code
             
             # Check if stuck was detected
-            if stuck_detected[0]:
+            if ctx.stuck_detected:
                 record_telemetry(2, 'stuck')
                 exit_code = 2
                 exit_code = map_exit_code(exit_code, args.unix_exit_codes)
                 return exit_code
             
             # Check if we timed out
-            if timed_out[0]:
+            if ctx.timed_out:
                 # Cancel overall timeout
                 if args.timeout:
                     signal.alarm(0)
@@ -3128,43 +3703,49 @@ Exit codes (Unix convention, --unix-exit-codes):
                 return 2
             
             # Handle delay-exit in pipe mode if match was found
-            if match_count[0] > 0 and args.delay_exit and args.delay_exit > 0 and match_timestamp[0] > 0:
-                elapsed = time.time() - match_timestamp[0]
+            if ctx.match_count > 0 and args.delay_exit and args.delay_exit > 0 and ctx.match_timestamp > 0:
+                elapsed = time.time() - ctx.match_timestamp
                 remaining = args.delay_exit - elapsed
                 
                 if remaining > 0:
                     if not args.quiet:
                         print(f"\n⏳ Waiting {remaining:.1f}s for error context...", file=sys.stderr)
                     
-                    # Continue reading for the delay period
-                    import select
-                    end_time = time.time() + remaining
-                    
-                    while time.time() < end_time:
-                        # Check if there's input available (non-blocking)
-                        if select.select([sys.stdin], [], [], 0.1)[0]:
+                    # Continue reading for the delay period. One persistent
+                    # selector (epoll on Linux) waits for the actual time
+                    # left instead of polling every 100ms, so the loop wakes
+                    # only on input and returns immediately at EOF
+                    # Monotonic deadline: immune to wall-clock jumps, and one
+                    # clock read per iteration feeds the selector timeout
+                    deadline = time.monotonic() + remaining
+                    sel = selectors.DefaultSelector()
+                    # Bound the write method once - echoed lines already end
+                    # in a newline, so a direct write beats print(end='')
+                    _write = sys.stdout.write
+                    try:
+                        sel.register(sys.stdin, selectors.EVENT_READ)
+                        while True:
+                            wait = deadline - time.monotonic()
+                            if wait <= 0 or not sel.select(timeout=wait):
+                                break  # Delay window elapsed
                             try:
                                 line = sys.stdin.readline()
-                                if not line:
-                                    break  # EOF
-                                if not args.quiet:
-                                    if use_color:
-                                        print(line, end='')
-                                    else:
-                                        print(line, end='')
-                            except:
+                            except (OSError, ValueError):
                                 break
-                        else:
-                            # No input available, just wait
-                            pass
+                            if not line:
+                                break  # EOF
+                            if not args.quiet:
+                                _write(line)
+                    finally:
+                        sel.close()
             
             # Cancel timeout on completion
             if args.timeout:
                 signal.alarm(0)
             
-            exit_code = 1 if match_count[0] == 0 else 0
-            exit_reason = 'no_match' if match_count[0] == 0 else 'match'
-            record_telemetry(exit_code, exit_reason, match_count[0])
+            exit_code = 1 if ctx.match_count == 0 else 0
+            exit_reason = 'no_match' if ctx.match_count == 0 else 'match'
+            record_telemetry(exit_code, exit_reason, ctx.match_count)
             # Apply exit code mapping if requested
             exit_code = map_exit_code(exit_code, args.unix_exit_codes)
             
@@ -3203,12 +3784,7 @@ Exit codes (Unix convention, --unix-exit-codes):
         if not args.quiet:
             print(f"\n⏱️  Timeout exceeded ({args.timeout}s)", file=sys.stderr)
             # Check if stdin is a pipe (not a TTY) - if so, upstream process may still be running
-            try:
-                is_pipe = not sys.stdin.isatty()
-            except:
-                is_pipe = True  # Assume it's a pipe if we can't check
-            
-            if is_pipe:
+            if not stdin_is_tty:
                 # We're in a pipeline - the upstream process might still be running
                 # This is expected behavior - the shell waits for the entire pipeline to complete
                 print("💡 Tip: If prompt doesn't return, press Ctrl+D (EOF) or Ctrl+C", file=sys.stderr)
@@ -3217,14 +3793,16 @@ Exit codes (Unix convention, --unix-exit-codes):
         # Close stdin to unblock any pending reads and force exit
         try:
             sys.stdin.close()
-        except:
+        except (OSError, ValueError):
             pass
         try:
             sys.stdout.flush()
             sys.stderr.flush()
-        except:
+        except (OSError, ValueError):
             pass
-        # Force exit to ensure we don't hang
+        # Force exit to ensure we don't hang (atexit won't run, so flush
+        # the telemetry writer explicitly first)
+        _flush_telemetry()
         os._exit(2)
     
     except KeyboardInterrupt:
@@ -3236,11 +3814,18 @@ Exit codes (Unix convention, --unix-exit-codes):
         return exit_code
     
     except BrokenPipeError:
-        # Gracefully handle broken pipe (e.g., when piped to head)
+        # Gracefully handle broken pipe (e.g., when piped to head).
+        # Skip interpreter shutdown entirely: flushing the closed stdout
+        # at exit would just re-raise and print "Exception ignored ..."
+        # noise. Same forced-exit pattern as the TimeoutError branch
         record_telemetry(0, 'broken_pipe')
-        exit_code = 0
-        exit_code = map_exit_code(exit_code, args.unix_exit_codes)
-        return exit_code
+        try:
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+        except OSError:
+            pass
+        _flush_telemetry()
+        os._exit(map_exit_code(0, args.unix_exit_codes))
     
     except Exception as e:
         if not args.quiet:
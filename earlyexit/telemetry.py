@@ -12,7 +12,7 @@ import time
 import hashlib
 import re
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from contextlib import contextmanager
 
 # Retry with exponential backoff for concurrent writes
@@ -357,6 +357,33 @@ class TelemetryCollector:
                 # Re-raise non-lock errors (schema errors, etc.)
                 raise
     
+    def _executemany_with_retry(self, conn, query: str, rows) -> None:
+        """
+        Execute one executemany batch with the same retry/lock policy
+        as _execute_with_retry
+
+        Args:
+            conn: Database connection
+            query: SQL query string
+            rows: Sequence of parameter tuples
+        """
+        retry_decorator = self._create_retry_decorator()
+
+        @retry_decorator
+        def _do_execute():
+            cursor = conn.cursor()
+            cursor.executemany(query, rows)
+            conn.commit()
+
+        try:
+            _do_execute()
+        except (sqlite3.OperationalError, sqlite3.DatabaseError) as e:
+            if 'database is locked' in str(e) or 'database is busy' in str(e):
+                # Silently fail - telemetry should never break execution
+                pass
+            else:
+                raise
+
     def record_execution(self, data: Dict[str, Any]) -> Optional[str]:
         """
         Record an execution
@@ -480,7 +507,55 @@ class TelemetryCollector:
             except Exception:
                 # Silently fail - don't disrupt execution
                 pass
-    
+
+    def record_match_events(self, execution_id: str, match_events: List[Dict[str, Any]]):
+        """
+        Record many match events in one connection and one commit
+
+        Args:
+            execution_id: ID of the execution the matches belong to
+            match_events: List of dicts in record_match_event's format
+
+        The per-event path opens a connection, replays the WAL pragma and
+        commits per row; for runs with many matches this batch path
+        amortizes all of that into a single transaction.
+        """
+        if not self.enabled or not execution_id or not match_events:
+            return
+
+        with self._get_connection() as conn:
+            if not conn:
+                return
+
+            try:
+                base = f"match_{int(time.time() * 1000)}_{os.getpid()}"
+                rows = [
+                    (
+                        f"{base}_{m.get('match_number', 0)}",
+                        execution_id,
+                        m.get('match_number', 0),
+                        m.get('timestamp_offset', 0.0),
+                        m.get('stream_source', 'stdout'),
+                        m.get('source_file', None),
+                        m.get('line_number', 0),
+                        self._scrub_pii(m.get('line_content', ''))[:1000],
+                        self._scrub_pii(m.get('matched_substring', ''))[:500],
+                        self._scrub_pii(m.get('context_before', ''))[:500],
+                        self._scrub_pii(m.get('context_after', ''))[:500]
+                    )
+                    for m in match_events
+                ]
+                self._executemany_with_retry(conn, """
+                    INSERT INTO match_events (
+                        event_id, execution_id, match_number, timestamp_offset,
+                        stream_source, source_file, line_number, line_content, matched_substring,
+                        context_before, context_after
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+            except Exception:
+                # Silently fail - don't disrupt execution
+                pass
+
     def record_user_session(self, session_data: Dict[str, Any]):
         """
         Record an interactive learning session